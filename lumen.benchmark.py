@@ -0,0 +1,46 @@
+import argparse
+import io
+import os
+import random
+from time import perf_counter
+
+import lumen
+
+
+def random_room(rng, room_length):
+    lighting_length = rng.randint(1, 6)
+    rows = []
+    for _ in range(room_length):
+        rows.append(" ".join("C" if rng.random() < 0.02 else "X" for _ in range(room_length)))
+    return "{}\n{}\n{}\n".format(room_length, lighting_length, "\n".join(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure lumen batch throughput (rooms/s) against the number of worker processes.")
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=25, help="room side length")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count()}))
+    parser.add_argument("--chunksize", type=int, default=lumen.BATCH_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    rng = random.Random(arguments.seed)
+    batch = "".join(random_room(rng, arguments.size) for _ in range(arguments.rooms)).encode()
+    backend = "numpy" if lumen.numpy is not None else "prefix"
+
+    print("{} rooms of {}x{} ({}), {} cores".format(arguments.rooms, arguments.size, arguments.size, backend, os.cpu_count()))
+    print("{:>7} {:>10} {:>10}".format("workers", "seconds", "rooms/s"))
+    expected = None
+    for workers in arguments.workers:
+        start = perf_counter()
+        results = list(lumen.count_dark_cells_batch(io.BytesIO(batch), workers, arguments.chunksize))
+        elapsed = perf_counter() - start
+        if expected is None:
+            expected = results
+        elif results != expected:
+            raise AssertionError("{} workers returned different counts".format(workers))
+        print("{:>7} {:>10.2f} {:>10.0f}".format(workers, elapsed, len(results) / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,17 @@
+import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CANDLE_BITS = bytes.maketrans(b"CX", b"10")
+BATCH_CHUNKSIZE = 16
+BATCH_WINDOW = 4
 
 
 class Pos:
@@ -7,25 +20,166 @@ class Pos:
         self.y = y
 
 
-room_length = int(input())
-lighting_length = int(input())
+def distance(pos1, pos2):
+    return max(abs(pos1.x - pos2.x), abs(pos1.y - pos2.y))
 
-candles = []
-for row in range(room_length):
-    for col, value in enumerate(input().split()):
-        if value == "C":
-            candles.append(Pos(row, col))
 
+def count_dark_cells_naive(room_length, lighting_length, rows):
+    candles = []
+    for row, values in enumerate(rows):
+        for col, value in enumerate(values):
+            if value == "C":
+                candles.append(Pos(row, col))
 
-def distance(pos1, pos2):
-    return max(abs(pos1.x - pos2.x), abs(pos1.y - pos2.y))
+    nb = 0
+    for i in range(room_length * room_length):
+        cell = Pos(i // room_length, i % room_length)
+        distance_to_candles = map(lambda candle: distance(cell, candle), candles)
+        far_from_candles = map(lambda dist: dist >= lighting_length, distance_to_candles)
+        nb += 1 if all(far_from_candles) else 0
+    return nb
+
+
+def window_bounds(room_length, reach):
+    lows = [max(0, i - reach) for i in range(room_length)]
+    highs = [min(room_length, i + reach + 1) for i in range(room_length)]
+    return lows, highs
+
+
+def count_dark_cells_numpy(room_length, lighting_length, rows):
+    if lighting_length <= 0:
+        return room_length * room_length
+    candles = (numpy.array(rows).reshape(room_length, room_length) == "C").astype(numpy.int64)
+    sums = numpy.zeros((room_length + 1, room_length + 1), dtype=numpy.int64)
+    sums[1:, 1:] = candles.cumsum(axis=0).cumsum(axis=1)
+    lows, highs = (numpy.array(bounds) for bounds in window_bounds(room_length, lighting_length - 1))
+    lit = sums[numpy.ix_(highs, highs)] - sums[numpy.ix_(lows, highs)] - sums[numpy.ix_(highs, lows)] + sums[numpy.ix_(lows, lows)]
+    return int((lit == 0).sum())
+
+
+def count_dark_cells_prefix(room_length, lighting_length, rows):
+    if lighting_length <= 0:
+        return room_length * room_length
+    lows, highs = window_bounds(room_length, lighting_length - 1)
+
+    column_sums = [[0] * room_length]
+    for values in rows:
+        prefix = [0]
+        for value in values:
+            prefix.append(prefix[-1] + (value == "C"))
+        lit = [prefix[high] > prefix[low] for low, high in zip(lows, highs)]
+        column_sums.append([total + cell for total, cell in zip(column_sums[-1], lit)])
+
+    nb = 0
+    for low, high in zip(lows, highs):
+        nb += sum(1 for top, bottom in zip(column_sums[low], column_sums[high]) if top == bottom)
+    return nb
+
+
+def dilate(mask, reach, full):
+    covered = 0
+    while covered < reach:
+        step = min(covered + 1, reach - covered)
+        mask |= (mask << step) | (mask >> step)
+        covered += step
+    return mask & full
+
+
+def count_dark_cells_streaming(stream):
+    room_length = int(stream.readline())
+    lighting_length = int(stream.readline())
+    reach = lighting_length - 1
+    full = (1 << room_length) - 1
+    window = deque(maxlen=2 * reach + 1 if reach >= 0 else 1)
+
+    nb = 0
+    emitted = 0
+    for row in range(room_length):
+        candles = int(stream.readline().translate(CANDLE_BITS, b" \t\r\n") or b"0", 2)
+        window.append(dilate(candles, reach, full) if reach >= 0 else 0)
+        if row >= reach:
+            nb += room_length - lit_cells(window, emitted, row, reach)
+            emitted += 1
+    for row in range(emitted, room_length):
+        nb += room_length - lit_cells(window, row, room_length - 1, reach)
+    return nb
+
+
+def lit_cells(window, row, last_read, reach):
+    first_in_window = last_read - len(window) + 1
+    lit = 0
+    for index, mask in enumerate(window, start=first_in_window):
+        if abs(index - row) <= reach:
+            lit |= mask
+    return lit.bit_count()
+
+
+def count_dark_cells(room_length, lighting_length, rows):
+    if numpy is not None:
+        return count_dark_cells_numpy(room_length, lighting_length, rows)
+    return count_dark_cells_prefix(room_length, lighting_length, rows)
+
+
+def read_rooms(stream):
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+        room_length = int(line)
+        lighting_length = int(stream.readline())
+        yield room_length, lighting_length, [stream.readline() for row in range(room_length)]
+
+
+def count_room(room):
+    room_length, lighting_length, rows = room
+    return count_dark_cells(room_length, lighting_length, [row.decode().split() for row in rows])
+
+
+def count_rooms(rooms):
+    return [count_room(room) for room in rooms]
+
+
+def count_dark_cells_batch(stream, workers, chunksize=BATCH_CHUNKSIZE):
+    rooms = read_rooms(stream)
+    if workers <= 1:
+        yield from map(count_room, rooms)
+        return
+    chunks = iter(lambda: list(islice(rooms, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(count_rooms, chunk) for chunk in islice(chunks, workers * BATCH_WINDOW))
+        while pending:
+            yield from pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(count_rooms, chunk))
+
+
+def option(name, default=None):
+    if name in sys.argv:
+        index = sys.argv.index(name) + 1
+        if index < len(sys.argv) and not sys.argv[index].startswith("--"):
+            return sys.argv[index]
+    return default
+
+
+def main():
+    if "--stream" in sys.argv:
+        print(count_dark_cells_streaming(sys.stdin.buffer))
+    elif "--batch" in sys.argv:
+        workers = int(option("--workers", os.cpu_count()))
+        path = option("--batch")
+        stream = open(path, "rb") if path else sys.stdin.buffer
+        with stream:
+            for nb in count_dark_cells_batch(stream, workers):
+                sys.stdout.write("{}\n".format(nb))
+    else:
+        room_length = int(input())
+        lighting_length = int(input())
+        rows = [input().split() for row in range(room_length)]
 
+        print(count_dark_cells(room_length, lighting_length, rows))
 
-nb = 0
-for i in range(room_length * room_length):
-    cell = Pos(i // room_length, i % room_length)
-    distance_to_candles = map(lambda candle: distance(cell, candle), candles)
-    far_from_candles = map(lambda dist: dist >= lighting_length, distance_to_candles)
-    nb += 1 if all(far_from_candles) else 0
 
-print(nb)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import random
+import sys
+from time import perf_counter_ns
+
+spec = importlib.util.spec_from_file_location("skynet", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skynet-revolution-episode-1.py"))
+skynet = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(skynet)
+
+STRATEGIES = {"distance": skynet.ExitDistances, "pressure": skynet.GatewayPressure}
+
+
+def random_network(rng, nb_nodes, nb_links, nb_exits):
+    links = set()
+    for node in range(1, nb_nodes):
+        links.add((rng.randrange(node), node))
+    while len(links) < nb_links:
+        link_start, link_end = rng.sample(range(nb_nodes), 2)
+        links.add((min(link_start, link_end), max(link_start, link_end)))
+    nodes = list(range(nb_nodes))
+    rng.shuffle(nodes)
+    return sorted(links), nodes[:nb_exits], nodes[nb_exits]
+
+
+def play(strategy, nb_nodes, links, exits, agent):
+    graph = skynet.graph_from_links(nb_nodes, links)
+    solver = strategy(graph, exits)
+    turn_times = []
+    while True:
+        start = perf_counter_ns()
+        link = solver.next_link(agent)
+        solver.remove(*link)
+        turn_times.append(perf_counter_ns() - start)
+
+        path = next(graph.shortest_path_to(agent, exits), None)
+        if path is None:
+            return True, turn_times
+        if len(path) == 2:
+            return False, turn_times
+        agent = path[1]
+
+
+def main():
+    nb_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = random.Random(0)
+    print("{:>7} {:>7} {:>5} {:<9} {:>5} {:>10} {:>10}".format("nodes", "links", "exits", "strategy", "wins", "mean us", "max us"))
+    for nb_nodes, links_per_node, nb_exits in [(1000, 2, 20), (10000, 2, 100), (100000, 2, 500)]:
+        games = [random_network(rng, nb_nodes, nb_nodes * links_per_node, nb_exits) for _ in range(nb_games)]
+        for name, strategy in STRATEGIES.items():
+            wins = 0
+            turn_times = []
+            for links, exits, agent in games:
+                won, times = play(strategy, nb_nodes, links, exits, agent)
+                wins += won
+                turn_times += times
+            print("{:>7} {:>7} {:>5} {:<9} {:>5} {:>10.1f} {:>10.1f}".format(
+                nb_nodes, nb_nodes * links_per_node, nb_exits, name, wins,
+                sum(turn_times) / len(turn_times) / 1000, max(turn_times) / 1000))
+
+
+if __name__ == "__main__":
+    main()
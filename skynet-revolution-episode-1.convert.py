@@ -0,0 +1,28 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+spec = importlib.util.spec_from_file_location("skynet", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skynet-revolution-episode-1.py"))
+skynet = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(skynet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a Skynet text network (the bot's initialisation input) to the binary CSR format loaded with --graph.")
+    parser.add_argument("input", help="text network, - for stdin")
+    parser.add_argument("output")
+    arguments = parser.parse_args()
+
+    if arguments.input == "-":
+        graph, exits = skynet.read_graph(sys.stdin.buffer)
+    else:
+        with open(arguments.input, "rb") as network:
+            graph, exits = skynet.read_graph(network)
+    skynet.write_graph(arguments.output, graph, exits)
+    print("{} nodes {} links {} exits -> {} ({} bytes)".format(
+        graph.nb_nodes, graph.offsets[graph.nb_nodes] // 2, len(exits), arguments.output, os.path.getsize(arguments.output)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,349 @@
+import heapq
+import itertools
+import mmap
+import struct
 import sys
+from array import array
+from collections import deque
+from time import perf_counter_ns
 
+UNREACHABLE = 2 ** 31 - 1
+STRATEGY = "distance"
 
-class Node:
-    def __init__(self, index):
-        self.index = index
-        self.neighbors = set()
-    
-    def append(self, node):
-        self.neighbors.add(node)
-    
-    def remove(self, node):
-        self.neighbors.remove(node)
-    
-    def __str__(self):
-        return "{}{}".format(self.index, [n.index for n in self.neighbors])
-    
-    def __repr__(self):
-        return "{}{}".format(self.index,  [n.index for n in self.neighbors])
-    
-    def shortest_path_to(self, goals):
-        queue = [(self, [self])]
+CSR_MAGIC = b"SKNT"
+CSR_HEADER = struct.Struct("<4sIII")
+
+DEBUG = False
+PROFILE = True
+PROFILE_HISTORY = 200
+
+
+class Profiler:
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.last = perf_counter_ns()
+
+    def start(self):
+        self.last = perf_counter_ns()
+
+    def lap(self, phase):
+        now = perf_counter_ns()
+        timings = self.timings.get(phase)
+        if timings is None:
+            timings = self.timings[phase] = deque(maxlen=PROFILE_HISTORY)
+        timings.append(now - self.last)
+        self.last = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        parts = ["profile ms p50/p99"]
+        for phase, timings in self.timings.items():
+            ordered = sorted(timings)
+            parts.append("{} {:.2f}/{:.2f}".format(phase, ordered[len(ordered) // 2] / 10 ** 6, ordered[len(ordered) * 99 // 100] / 10 ** 6))
+        for name, value in self.counters.items():
+            parts.append("{} {}".format(name, value))
+        self.counters = {}
+        return " ".join(parts)
+
+
+class Graph:
+    def __init__(self, nb_nodes, offsets, degrees, targets):
+        self.nb_nodes = nb_nodes
+        self.offsets = offsets
+        self.degrees = degrees
+        self.targets = targets
+
+    def neighbors(self, node):
+        start = self.offsets[node]
+        return self.targets[start:start + self.degrees[node]]
+
+    def unlink(self, node, neighbor):
+        start = self.offsets[node]
+        last = start + self.degrees[node] - 1
+        for position in range(start, last + 1):
+            if self.targets[position] == neighbor:
+                self.targets[position] = self.targets[last]
+                self.targets[last] = neighbor
+                self.degrees[node] -= 1
+                return
+
+    def remove(self, link_start, link_end):
+        self.unlink(link_start, link_end)
+        self.unlink(link_end, link_start)
+
+    def describe(self, node):
+        return "{}{}".format(node, list(self.neighbors(node)))
+
+    def shortest_path_to(self, source, goals):
+        is_goal = bytearray(self.nb_nodes)
+        for goal in goals:
+            is_goal[goal] = 1
+        visited = bytearray(self.nb_nodes)
+        parents = array("i", [-1]) * self.nb_nodes
+        offsets = self.offsets
+        targets = self.targets
+        degrees = self.degrees
+
+        visited[source] = 1
+        queue = deque([source])
         while queue:
-            node, path = queue.pop(0)
-            print("queue={} node={} path={} goals={}".format(queue, node, path, goals), file=sys.stderr)
-            for neighbor in node.neighbors - set(path):
-                if neighbor in goals:
-                    yield path + [neighbor]
+            node = queue.popleft()
+            start = offsets[node]
+            for neighbor in targets[start:start + degrees[node]]:
+                if visited[neighbor]:
+                    continue
+                if is_goal[neighbor]:
+                    yield self.path(parents, node) + [neighbor]
                 else:
-                    queue.append((neighbor, path + [neighbor]))
+                    visited[neighbor] = 1
+                    parents[neighbor] = node
+                    queue.append(neighbor)
+
+    def path(self, parents, node):
+        path = [node]
+        while parents[node] != -1:
+            node = parents[node]
+            path.append(node)
+        path.reverse()
+        return path
+
+
+def graph_from_ends(nb_nodes, ends):
+    degrees = array("i", [0]) * nb_nodes
+    for node in ends:
+        degrees[node] += 1
+    offsets = array("i", [0]) * (nb_nodes + 1)
+    for node in range(nb_nodes):
+        offsets[node + 1] = offsets[node] + degrees[node]
+    targets = array("i", [0]) * offsets[nb_nodes]
+    filled = array("i", offsets[:nb_nodes])
+    neighbors = array("i", ends)
+    neighbors[0::2] = ends[1::2]
+    neighbors[1::2] = ends[0::2]
+    for node, neighbor in zip(ends, neighbors):
+        targets[filled[node]] = neighbor
+        filled[node] += 1
+    return Graph(nb_nodes, offsets, degrees, targets)
+
+
+def graph_from_links(nb_nodes, links):
+    return graph_from_ends(nb_nodes, array("i", itertools.chain.from_iterable(links)))
+
+
+def read_graph(stream):
+    nb_nodes, nb_links, nb_exits = [int(i) for i in stream.readline().split()]
+    ends = array("i", map(int, b" ".join(itertools.islice(stream, nb_links)).split()))
+    exits = [int(stream.readline()) for exit_idx in range(nb_exits)]
+    return graph_from_ends(nb_nodes, ends), exits
+
+
+def write_graph(path, graph, exits):
+    nb_links = graph.offsets[graph.nb_nodes] // 2
+    with open(path, "wb") as output:
+        output.write(CSR_HEADER.pack(CSR_MAGIC, graph.nb_nodes, nb_links, len(exits)))
+        for values in (graph.offsets, graph.degrees, graph.targets, exits):
+            array("i", values).tofile(output)
+
+
+def load_graph(path):
+    with open(path, "rb") as graph_file:
+        data = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, nb_nodes, nb_links, nb_exits = CSR_HEADER.unpack_from(data)
+    if magic != CSR_MAGIC or len(data) != CSR_HEADER.size + 4 * (2 * nb_nodes + 1 + 2 * nb_links + nb_exits):
+        raise ValueError("{} is not a Skynet graph file".format(path))
+    values = memoryview(data)[CSR_HEADER.size:].cast("i")
+    offsets = values[:nb_nodes + 1]
+    degrees = values[nb_nodes + 1:2 * nb_nodes + 1]
+    targets = values[2 * nb_nodes + 1:2 * nb_nodes + 1 + 2 * nb_links]
+    exits = list(values[2 * nb_nodes + 1 + 2 * nb_links:])
+    return Graph(nb_nodes, offsets, degrees, targets), exits
+
+
+class ExitDistances:
+    def __init__(self, graph, exits):
+        self.graph = graph
+        self.distances = array("i", [UNREACHABLE]) * graph.nb_nodes
+        queue = deque(exits)
+        for exit_node in exits:
+            self.distances[exit_node] = 0
+        while queue:
+            node = queue.popleft()
+            distance = self.distances[node] + 1
+            for neighbor in graph.neighbors(node):
+                if self.distances[neighbor] == UNREACHABLE:
+                    self.distances[neighbor] = distance
+                    queue.append(neighbor)
+
+    def next_link(self, agent):
+        return agent, min(self.graph.neighbors(agent), key=self.distances.__getitem__)
+
+    def supported(self, node, affected):
+        parent_distance = self.distances[node] - 1
+        for neighbor in self.graph.neighbors(node):
+            if self.distances[neighbor] == parent_distance and not affected[neighbor]:
+                return True
+        return False
+
+    def remove(self, link_start, link_end):
+        self.graph.remove(link_start, link_end)
+        distances = self.distances
+        if distances[link_start] < distances[link_end]:
+            link_start, link_end = link_end, link_start
+        if distances[link_start] == UNREACHABLE or distances[link_start] != distances[link_end] + 1:
+            return
+
+        affected = bytearray(self.graph.nb_nodes)
+        if self.supported(link_start, affected):
+            return
+        affected[link_start] = 1
+        region = [link_start]
+        queue = deque(region)
+        while queue:
+            node = queue.popleft()
+            child_distance = distances[node] + 1
+            for neighbor in self.graph.neighbors(node):
+                if distances[neighbor] == child_distance and not affected[neighbor] and not self.supported(neighbor, affected):
+                    affected[neighbor] = 1
+                    region.append(neighbor)
+                    queue.append(neighbor)
+
+        heap = []
+        for node in region:
+            distance = UNREACHABLE
+            for neighbor in self.graph.neighbors(node):
+                if not affected[neighbor] and distances[neighbor] != UNREACHABLE:
+                    distance = min(distance, distances[neighbor] + 1)
+            distances[node] = distance
+            if distance != UNREACHABLE:
+                heapq.heappush(heap, (distance, node))
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance != distances[node]:
+                continue
+            for neighbor in self.graph.neighbors(node):
+                if affected[neighbor] and distances[neighbor] > distance + 1:
+                    distances[neighbor] = distance + 1
+                    heapq.heappush(heap, (distance + 1, neighbor))
+
+
+class GatewayPressure:
+    def __init__(self, graph, exits):
+        self.graph = graph
+        self.exits = exits
+        self.is_exit = bytearray(graph.nb_nodes)
+        for exit_node in exits:
+            self.is_exit[exit_node] = 1
+        self.gateways = array("i", [0]) * graph.nb_nodes
+        for exit_node in exits:
+            for neighbor in graph.neighbors(exit_node):
+                self.gateways[neighbor] += 1
+        self.max_gateways = max(self.gateways)
+        self.nodes_by_gateways = [0] * (self.max_gateways + 1)
+        for count in self.gateways:
+            self.nodes_by_gateways[count] += 1
+        self.distances = array("i", [UNREACHABLE]) * graph.nb_nodes
+        self.reached = array("i", [0]) * graph.nb_nodes
+        self.settled = array("i", [0]) * graph.nb_nodes
+        self.generation = 0
+
+    def next_link(self, agent):
+        graph = self.graph
+        is_exit = self.is_exit
+        for neighbor in graph.neighbors(agent):
+            if is_exit[neighbor]:
+                return agent, neighbor
+
+        gateways = self.gateways
+        max_gateways = self.max_gateways
+        distances = self.distances
+        reached = self.reached
+        settled = self.settled
+        self.generation += 1
+        generation = self.generation
+        distances[agent] = 0
+        reached[agent] = generation
+        queue = deque([agent])
+        best, best_key = None, None
+        while queue:
+            node = queue.popleft()
+            if settled[node] == generation:
+                continue
+            settled[node] = generation
+            distance = distances[node]
+            if best_key is not None and (distance > max_gateways or max_gateways - distance < best_key[0]):
+                break
+            if gateways[node]:
+                key = (gateways[node] - distance, gateways[node])
+                if best_key is None or key > best_key:
+                    best, best_key = node, key
+            for neighbor in graph.neighbors(node):
+                if is_exit[neighbor] or settled[neighbor] == generation:
+                    continue
+                if reached[neighbor] != generation:
+                    reached[neighbor] = generation
+                    distances[neighbor] = UNREACHABLE
+                if gateways[neighbor]:
+                    if distance < distances[neighbor]:
+                        distances[neighbor] = distance
+                        queue.appendleft(neighbor)
+                elif distance + 1 < distances[neighbor]:
+                    distances[neighbor] = distance + 1
+                    queue.append(neighbor)
+
+        if best is None:
+            return agent, graph.neighbors(agent)[0]
+        for neighbor in graph.neighbors(best):
+            if is_exit[neighbor]:
+                return best, neighbor
+
+    def remove(self, link_start, link_end):
+        self.graph.remove(link_start, link_end)
+        if self.is_exit[link_end]:
+            self.drop_gateway(link_start)
+        if self.is_exit[link_start]:
+            self.drop_gateway(link_end)
+
+    def drop_gateway(self, node):
+        self.nodes_by_gateways[self.gateways[node]] -= 1
+        self.gateways[node] -= 1
+        self.nodes_by_gateways[self.gateways[node]] += 1
+        while self.max_gateways and not self.nodes_by_gateways[self.max_gateways]:
+            self.max_gateways -= 1
 
 
-nb_nodes, nb_links, nb_exits = [int(i) for i in input().split()]
+def main():
+    start = perf_counter_ns()
+    if "--graph" in sys.argv:
+        graph, exits = load_graph(sys.argv[sys.argv.index("--graph") + 1])
+    else:
+        graph, exits = read_graph(sys.stdin.buffer)
 
-nodes = [Node(i) for i in range(nb_nodes)]
-exits = []
+    if DEBUG:
+        for node in range(graph.nb_nodes):
+            print(graph.describe(node), file=sys.stderr)
 
-for link_idx in range(nb_links):
-    link_start, link_end = [int(value) for value in input().split()]
-    nodes[link_start].append(nodes[link_end])
-    nodes[link_end].append(nodes[link_start])
+    solver = GatewayPressure(graph, exits) if STRATEGY == "pressure" else ExitDistances(graph, exits)
+    if PROFILE:
+        print("startup {:.1f}ms".format((perf_counter_ns() - start) / 10 ** 6), file=sys.stderr)
 
-for exit_idx in range(nb_exits):
-    exit_node = int(input())
-    exits.append(nodes[exit_node])
+    profiler = Profiler()
+    while True:
+        skynet_agent_node = int(sys.stdin.buffer.readline())
+        profiler.start()
+        link_start, link_end = solver.next_link(skynet_agent_node)
+        profiler.lap("search")
+        if DEBUG:
+            print((link_start, link_end), file=sys.stderr)
+        print("{} {}".format(link_start, link_end), flush=True)
+        profiler.lap("output")
+        solver.remove(link_start, link_end)
+        profiler.lap("update")
+        if PROFILE:
+            print(profiler.report(), file=sys.stderr)
 
-for node in nodes:
-    print(node, file=sys.stderr)
 
-while True:
-    skynet_agent_node = nodes[int(input())]
-    exit_path = next(skynet_agent_node.shortest_path_to(exits))
-    link_start, link_end = exit_path[0].index, exit_path[1].index
-    print(exit_path, file=sys.stderr)
-    print("{} {}".format(link_start, link_end))
-    nodes[link_start].remove(nodes[link_end])
-    nodes[link_end].remove(nodes[link_start])
+if __name__ == "__main__":
+    main()
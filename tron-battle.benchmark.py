@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import random
+import sys
+from asyncio import Queue
+from time import perf_counter_ns
+
+spec = importlib.util.spec_from_file_location("tron_battle", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tron-battle.py"))
+tron = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tron)
+
+WIDTH = 30
+HEIGHT = 20
+
+
+def sample_moves(seed, nb_players, nb_turns):
+    rng = random.Random(seed)
+    cells = [(row, col) for row in range(HEIGHT) for col in range(WIDTH)]
+    starts = rng.sample(cells, nb_players)
+    game = tron.Game(WIDTH, HEIGHT, list(starts), 0)
+    moves = []
+    for turn in range(nb_turns):
+        for player in range(nb_players):
+            possible_moves = game.free_neighbors(*game.players[player])
+            row, col = rng.choice(possible_moves)[1:] if possible_moves else tron.DEAD
+            game.update(player, row, col)
+            moves.append((player, row, col))
+    return starts, moves
+
+
+def positions(backend, samples):
+    for starts, moves in samples:
+        game = backend(WIDTH, HEIGHT, list(starts), 0)
+        for move in moves:
+            game.update(*move)
+        yield game
+
+
+def copy_and_flood_valuation(game):
+    my_value = 0
+    enemy_value = 0
+    queues = list()
+    positions = list(filter(lambda player: player != tron.DEAD, game.players))
+
+    saved_nodes = [[content for content in row] for row in game.nodes]
+
+    for cell in positions:
+        queue = Queue()
+        queue.put_nowait(cell)
+        queues.append(queue)
+
+    while not all(map(lambda queue: queue.empty(), queues)):
+        for player, queue in enumerate(queues):
+            if queue.empty():
+                continue
+            if game.players[player][0] == -1:
+                item_row, item_col = queue.get_nowait()
+                game.nodes[item_row][item_col] = tron.FREE
+                continue
+            symbol = tron.PLAYERS_SYMBOLS[player]
+            item_row, item_col = queue.get_nowait()
+            for _, neighbor_row, neighbor_col in game.free_neighbors(item_row, item_col):
+                game.nodes[neighbor_row][neighbor_col] = symbol
+
+                queue.put_nowait((neighbor_row, neighbor_col))
+                if player == game.me:
+                    my_value += 1
+                else:
+                    enemy_value += 1
+
+    game.nodes = saved_nodes
+    return (my_value - enemy_value) / (my_value + enemy_value + 1)
+
+
+def leaves_per_second(games, valuation, duration_ns):
+    leaves = 0
+    start = perf_counter_ns()
+    while perf_counter_ns() - start < duration_ns:
+        for game in games:
+            valuation(game)
+        leaves += len(games)
+    return leaves * 10 ** 9 / (perf_counter_ns() - start)
+
+
+if __name__ == "__main__":
+    duration_ns = int(float(sys.argv[1]) * 10 ** 9) if len(sys.argv) > 1 else 2 * 10 ** 9
+    samples = [sample_moves(seed, nb_players, nb_turns) for seed, (nb_players, nb_turns) in enumerate([(2, 0), (2, 40), (3, 20), (4, 10)])]
+    benchmarks = [
+        ("copy-and-flood", tron.Game, copy_and_flood_valuation),
+        ("Game", tron.Game, tron.Game.valuation),
+        ("BitboardGame", tron.BitboardGame, tron.BitboardGame.valuation)
+    ]
+    for name, backend, valuation in benchmarks:
+        games = list(positions(backend, samples))
+        print("{:<14} {:>10.0f} leaves/s".format(name, leaves_per_second(games, valuation, duration_ns)))
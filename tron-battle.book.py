@@ -0,0 +1,162 @@
+import argparse
+import importlib.util
+import itertools
+import os
+import random
+import sys
+
+spec = importlib.util.spec_from_file_location("tron_battle", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tron-battle.py"))
+tron = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tron)
+
+WIDTH = 30
+HEIGHT = 20
+DIRECTIONS = {"RIGHT": (0, 1), "DOWN": (1, 0), "LEFT": (0, -1), "UP": (-1, 0)}
+
+
+def read_starts(path):
+    with open(path) as transcript:
+        nb_players, _ = [int(i) for i in transcript.readline().split()]
+        starts = []
+        for _ in range(nb_players):
+            col, row, _, _ = [int(i) for i in transcript.readline().split()]
+            starts.append((row, col))
+    return starts
+
+
+def random_starts(rng, nb_players):
+    cells = [(row, col) for row in range(HEIGHT) for col in range(WIDTH)]
+    return rng.sample(cells, nb_players)
+
+
+def block_starts(rng, nb_players):
+    block = tron.BOOK_BLOCKS[nb_players]
+    blocks = [[(row, col) for row in range(top, min(top + block, HEIGHT)) for col in range(left, min(left + block, WIDTH))]
+              for top in range(0, HEIGHT, block) for left in range(0, WIDTH, block)]
+    for cells in blocks:
+        own = [(row, col) for row, col in cells if row * 2 < HEIGHT and col * 2 < WIDTH]
+        if not own:
+            continue
+        for others in itertools.product(blocks, repeat=nb_players - 1):
+            starts = [rng.choice(own)]
+            for other in others:
+                free = [cell for cell in other if cell not in starts]
+                if not free:
+                    break
+                starts.append(rng.choice(free))
+            else:
+                yield starts
+
+
+def search_moves(games, budget_ns, entries):
+    moves = {}
+    for player, game in enumerate(games):
+        if game.players[player] == tron.DEAD:
+            continue
+        book_key = game.book_key()
+        if book_key is not None and book_key[0] in entries:
+            key, flip_rows, flip_cols = book_key
+            moves[player] = tron.flip_direction(tron.DIRECTIONS[entries[key]], flip_rows, flip_cols)
+            continue
+        _, direction = game.search(tron.perf_counter_ns() + budget_ns)
+        moves[player] = direction
+        if direction in DIRECTIONS and book_key is not None:
+            key, flip_rows, flip_cols = book_key
+            entries[key] = tron.DIRECTIONS.index(tron.flip_direction(direction, flip_rows, flip_cols))
+    return moves
+
+
+def apply(games, joint_move):
+    undo = []
+    referee = games[0]
+    for player, direction in enumerate(joint_move):
+        row, col = referee.players[player]
+        if direction in DIRECTIONS and (row, col) != tron.DEAD:
+            row, col = row + DIRECTIONS[direction][0], col + DIRECTIONS[direction][1]
+        if (row, col) == tron.DEAD or direction not in DIRECTIONS or not referee.is_free(row, col):
+            row, col = tron.DEAD
+        for game in games:
+            undo.append((game, player, game.update(player, row, col)))
+    return undo
+
+
+def expand(games, turn, arguments, entries):
+    alive = [player for player, position in enumerate(games[0].players) if position != tron.DEAD]
+    if turn >= arguments.turns or len(alive) < 2:
+        return
+    moves = search_moves(games, arguments.budget_ms * 10 ** 6, entries)
+    options = []
+    for player, position in enumerate(games[0].players):
+        if position == tron.DEAD:
+            options.append([None])
+        elif turn < arguments.wide_turns:
+            options.append([direction for direction, _, _ in games[0].free_neighbors(*position)] or [None])
+        else:
+            options.append([moves[player]])
+
+    for joint_move in itertools.product(*options):
+        undo = apply(games, joint_move)
+        try:
+            expand(games, turn + 1, arguments, entries)
+        finally:
+            for game, player, last_state in reversed(undo):
+                game.rollback(player, *last_state)
+
+
+def write_book(path, entries):
+    slots = 16
+    while slots < 2 * len(entries):
+        slots *= 2
+    table = [(0, 0)] * slots
+    for key, move in entries.items():
+        if key == 0:
+            continue
+        slot = key & (slots - 1)
+        while table[slot][0]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = key, move
+
+    with open(path, "wb") as book:
+        book.write(tron.BOOK_HEADER.pack(tron.BOOK_MAGIC, tron.ZOBRIST_SEED, WIDTH, HEIGHT, slots))
+        for key, move in table:
+            book.write(tron.BOOK_SLOT.pack(key, move))
+    return slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Tron opening book by deep self-play from common start positions.")
+    parser.add_argument("transcripts", nargs="*", help="take start positions from these transcripts")
+    parser.add_argument("--random", type=int, default=0, help="random start positions per player count")
+    parser.add_argument("--blocks", action="store_true", help="one start for every combination of start blocks per player count")
+    parser.add_argument("--players", type=int, nargs="+", default=[2])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--turns", type=int, default=6, help="book depth in turns")
+    parser.add_argument("--wide-turns", type=int, default=1, help="turns for which every opponent reply is expanded")
+    parser.add_argument("--budget-ms", type=int, default=1000, help="search budget per book move")
+    parser.add_argument("--depth", type=int, help="fixed search depth instead of the time budget, for reproducible books")
+    parser.add_argument("--output", default=tron.BOOK_PATH)
+    arguments = parser.parse_args()
+    if arguments.depth:
+        tron.MAX_DEPTH = arguments.depth
+        tron.ENDGAME_BUDGET_NS = 10 ** 15
+        arguments.budget_ms = 10 ** 9
+
+    rng = random.Random(arguments.seed)
+    configurations = [read_starts(path) for path in arguments.transcripts]
+    for nb_players in arguments.players:
+        configurations += [random_starts(rng, nb_players) for _ in range(arguments.random)]
+        if arguments.blocks:
+            configurations += list(block_starts(rng, nb_players))
+
+    entries = {}
+    for starts in configurations:
+        games = [tron.BitboardGame(WIDTH, HEIGHT, list(starts), player) for player in range(len(starts))]
+        expand(games, 0, arguments, entries)
+        print("{} players {} entries".format(starts, len(entries)), file=sys.stderr)
+
+    slots = write_book(arguments.output, entries)
+    print("{} entries in {} slots, {} bytes".format(len(entries), slots, tron.BOOK_HEADER.size + slots * tron.BOOK_SLOT.size))
+
+
+if __name__ == "__main__":
+    main()
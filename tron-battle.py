@@ -1,5 +1,10 @@
+import mmap
+import multiprocessing
+import os
+import random
+import struct
 import sys
-from asyncio import Queue
+from collections import deque
 from time import perf_counter_ns
 
 FREE = "·"
@@ -8,6 +13,218 @@ WALL = "█"
 PLAYERS_SYMBOLS = ["o", "+", "x", "¤"]
 HEAD_SYMBOL = "■"
 DEAD = -1, -1
+BLOCKED = -1
+CONTESTED = -2
+
+TURN_BUDGET_NS = 90 * 10 ** 6
+MAX_DEPTH = 64
+WORKERS = 0
+
+ZOBRIST_SEED = 20191019
+TABLE_BITS = 17
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+PARANOID = "paranoid"
+BEST_REPLY = "best-reply"
+SEARCH_MODE = PARANOID
+ENDGAME = "endgame"
+FILL_NODE_LIMIT = 10000
+ENDGAME_BUDGET_NS = 10 * 10 ** 6
+MOVE_ORDERING = True
+BOOK = "book"
+
+DIRECTIONS = ["RIGHT", "DOWN", "LEFT", "UP"]
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tron-battle.book")
+BOOK_MAGIC = b"TRB2"
+BOOK_HEADER = struct.Struct("<4sIHHI")
+BOOK_SLOT = struct.Struct("<QB")
+BOOK_MAX_TURNS = 12
+BOOK_BLOCKS = {2: 3, 3: 5, 4: 10}
+
+DEBUG = False
+PROFILE = True
+PROFILE_HISTORY = 200
+
+
+class Profiler:
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.last = perf_counter_ns()
+
+    def start(self):
+        self.last = perf_counter_ns()
+
+    def lap(self, phase):
+        now = perf_counter_ns()
+        timings = self.timings.get(phase)
+        if timings is None:
+            timings = self.timings[phase] = deque(maxlen=PROFILE_HISTORY)
+        timings.append(now - self.last)
+        self.last = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        parts = ["profile ms p50/p99"]
+        for phase, timings in self.timings.items():
+            ordered = sorted(timings)
+            parts.append("{} {:.2f}/{:.2f}".format(phase, ordered[len(ordered) // 2] / 10 ** 6, ordered[len(ordered) * 99 // 100] / 10 ** 6))
+        for name, value in self.counters.items():
+            parts.append("{} {}".format(name, value))
+        self.counters = {}
+        return " ".join(parts)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class OpeningBook:
+    def __init__(self, data, slots):
+        self.data = data
+        self.mask = slots - 1
+
+    def lookup(self, key):
+        slot = key & self.mask
+        while True:
+            stored_key, move = BOOK_SLOT.unpack_from(self.data, BOOK_HEADER.size + slot * BOOK_SLOT.size)
+            if stored_key == key:
+                return move
+            if stored_key == 0:
+                return None
+            slot = (slot + 1) & self.mask
+
+
+def open_book(path, width, height):
+    try:
+        with open(path, "rb") as book_file:
+            data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) < BOOK_HEADER.size:
+        return None
+    magic, seed, book_width, book_height, slots = BOOK_HEADER.unpack_from(data)
+    if (magic, seed, book_width, book_height) != (BOOK_MAGIC, ZOBRIST_SEED, width, height):
+        return None
+    if not slots or slots & (slots - 1) or len(data) != BOOK_HEADER.size + slots * BOOK_SLOT.size:
+        return None
+    return OpeningBook(data, slots)
+
+
+def flip_direction(direction, flip_rows, flip_cols):
+    if flip_cols:
+        direction = {"RIGHT": "LEFT", "LEFT": "RIGHT"}.get(direction, direction)
+    if flip_rows:
+        direction = {"DOWN": "UP", "UP": "DOWN"}.get(direction, direction)
+    return direction
+
+
+class TranspositionTable:
+    def __init__(self, bits):
+        size = 1 << bits
+        self.mask = size - 1
+        self.keys = [None] * size
+        self.depths = [-1] * size
+        self.generations = [0] * size
+        self.bounds = [EXACT] * size
+        self.values = [0] * size
+        self.moves = [None] * size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            self.hits += 1
+            return slot
+        return None
+
+    def store(self, key, depth, bound, value, move):
+        slot = key & self.mask
+        if self.keys[slot] != key and self.depths[slot] > depth and self.generations[slot] == self.generation:
+            return
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.generations[slot] = self.generation
+        self.bounds[slot] = bound
+        self.values[slot] = value
+        self.moves[slot] = move
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0
+
+
+class VoronoiEvaluator:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.distance = [0] * (width * height)
+        self.owner = [BLOCKED] * (width * height)
+        self.stamp = [0] * (width * height)
+        self.generation = 0
+        self.queue = deque()
+        self.neighbors = [self.cell_neighbors(index // width, index % width) for index in range(width * height)]
+
+    def cell_neighbors(self, row, col):
+        candidates = [(row, col + 1), (row + 1, col), (row, col - 1), (row - 1, col)]
+        return [(row * self.width + col, row, col) for row, col in candidates if 0 <= row < self.height and 0 <= col < self.width]
+
+    def evaluate(self, nodes, players, me):
+        self.generation += 1
+        generation = self.generation
+        distance = self.distance
+        owner = self.owner
+        stamp = self.stamp
+        neighbors = self.neighbors
+        queue = self.queue
+        counts = [0 for _ in players]
+        dead_symbols = {PLAYERS_SYMBOLS[player] for player, position in enumerate(players) if position == DEAD}
+
+        for player, (row, col) in enumerate(players):
+            if (row, col) == DEAD:
+                continue
+            index = row * self.width + col
+            stamp[index] = generation
+            distance[index] = 0
+            owner[index] = player
+            queue.append(index)
+
+        while queue:
+            index = queue.popleft()
+            player = owner[index]
+            if player == CONTESTED:
+                continue
+            next_distance = distance[index] + 1
+            for neighbor, row, col in neighbors[index]:
+                if stamp[neighbor] != generation:
+                    stamp[neighbor] = generation
+                    cell = nodes[row][col]
+                    if cell != FREE and cell not in dead_symbols:
+                        owner[neighbor] = BLOCKED
+                        distance[neighbor] = -1
+                        continue
+                    owner[neighbor] = player
+                    distance[neighbor] = next_distance
+                    counts[player] += 1
+                    queue.append(neighbor)
+                elif distance[neighbor] == next_distance and owner[neighbor] not in (player, CONTESTED):
+                    counts[owner[neighbor]] -= 1
+                    owner[neighbor] = CONTESTED
+
+        my_value = counts[me]
+        enemy_value = sum(counts) - my_value
+        return (my_value - enemy_value) / (my_value + enemy_value + 1)
 
 
 class Game:
@@ -26,11 +243,46 @@ class Game:
         self.width = width
         self.height = height
         self.nodes = [[FREE for _ in range(width)] for _ in range(height)]
+        self.evaluator = VoronoiEvaluator(width, height)
         self.players = players_starting_positions
+        self.init_hashing()
         for player, position in enumerate(players_starting_positions):
             self.update(player, *position)
         self.me = current_player
 
+    def init_hashing(self):
+        rng = random.Random(ZOBRIST_SEED)
+        size = self.width * self.height
+        self.trail_keys = [rng.getrandbits(64) for _ in range(size)]
+        self.head_keys = [[rng.getrandbits(64) for _ in range(size)] for _ in PLAYERS_SYMBOLS]
+        self.dead_keys = [rng.getrandbits(64) for _ in PLAYERS_SYMBOLS]
+        self.turn_keys = [rng.getrandbits(64) for _ in PLAYERS_SYMBOLS]
+        span = 2 * BOOK_MAX_TURNS + 1
+        self.book_keys = [[rng.getrandbits(64) for _ in range(2 * span * span + size)] for _ in PLAYERS_SYMBOLS]
+        self.table = TranspositionTable(TABLE_BITS)
+        self.pv_lines = [[] for _ in range(MAX_DEPTH + 2)]
+        self.pv = []
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 2)]
+        self.history = [[0] * size for _ in PLAYERS_SYMBOLS]
+        self.frozen = set()
+        self.book = None
+        self.hash = 0
+        for player, position in enumerate(self.players):
+            self.hash ^= self.head_key(player, *position)
+
+    def head_key(self, player, row, col):
+        if row < 0 or col < 0:
+            return self.dead_keys[player]
+        return self.head_keys[player][row * self.width + col]
+
+    def trail_key(self, row, col):
+        if row < 0 or col < 0:
+            return 0
+        return self.trail_keys[row * self.width + col]
+
+    def rehash(self, player, last_row, last_col, row, col):
+        self.hash ^= self.head_key(player, last_row, last_col) ^ self.head_key(player, row, col) ^ self.trail_key(row, col)
+
     def cell(self, row, col):
         if row < 0:
             return WALL
@@ -79,28 +331,177 @@ class Game:
         else:
             self.players[player] = row, col
             self.nodes[row][col] = PLAYERS_SYMBOLS[player]
+        self.rehash(player, last_row, last_col, *self.players[player])
 
         return last_row, last_col, last_content
 
     def rollback(self, player, row, col, cell):
+        current_row, current_col = self.players[player]
+        self.rehash(player, row, col, current_row, current_col)
+        self.nodes[current_row][current_col] = cell
         self.players[player] = row, col
-        self.nodes[row][col] = cell
 
-    def alphabeta(self, player, depth, timer, alpha, beta):
+    def frozen_players(self):
+        return set()
+
+    def separated(self):
+        return False
+
+    def book_move(self):
+        return None
+
+    def predicted_move(self, possible_moves):
+        return max(possible_moves, key=lambda move: len(self.free_neighbors(move[1], move[2])))
+
+    def search(self, deadline, player=None):
+        start = perf_counter_ns()
+        self.table.new_search()
+        self.new_ordering()
+        self.frozen = self.frozen_players()
+        self.searched_nodes = 0
+        self.depth_reached = 0
+        self.depth_values = []
+        self.fill_length = 0
+        self.pv = []
+        self.mode = SEARCH_MODE
+        if player is None:
+            direction = self.book_move()
+            if direction is not None:
+                self.mode = BOOK
+                self.pv = [direction]
+                self.search_time = perf_counter_ns() - start
+                return 0, direction
+            if self.separated():
+                return self.endgame(deadline, start)
+
+        searching = self.me if player is None else player
+        possible_moves = self.free_neighbors(*self.players[searching])
+        value, direction = 0, possible_moves[0][0] if possible_moves else "GIVE UP"
+        for depth in range(1, MAX_DEPTH + 1):
+            try:
+                value, direction = self.alphabeta(searching, depth, deadline, -2, 2)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+            self.depth_values.append(value)
+            self.pv = self.pv_lines[0]
+            if (perf_counter_ns() - start) * 2 > deadline - start:
+                break
+        self.search_time = perf_counter_ns() - start
+        return value, direction
+
+    def search_parallel(self, pool, deadline):
+        start = perf_counter_ns()
+        possible_moves = self.free_neighbors(*self.players[self.me])
+        if not possible_moves or self.book_move() is not None or self.separated():
+            return self.search(deadline)
+
+        state = self.state()
+        tasks = [(state, direction, row, col, deadline) for direction, row, col in possible_moves]
+        results = pool.map(search_root_move, tasks, chunksize=1)
+
+        completed = [result for result in results if result[0]] or results
+        common_depth = min(len(result[0]) for result in completed)
+        values, direction, _, _, _ = max(completed, key=lambda result: result[0][common_depth - 1] if common_depth else 0)
+        value = values[common_depth - 1] if common_depth else 0
+        self.table.new_search()
+        self.table.probes = sum(result[3] for result in results)
+        self.table.hits = sum(result[4] for result in results)
+        self.frozen = self.frozen_players()
+        self.searched_nodes = sum(result[2] for result in results)
+        self.depth_reached = common_depth + 1 if common_depth else 0
+        self.pv = [direction]
+        self.mode = SEARCH_MODE
+        self.search_time = perf_counter_ns() - start
+        return value, direction
+
+    def search_report(self):
+        branching = self.searched_nodes ** (1 / self.depth_reached) if self.depth_reached else 0
+        return "depth {} nodes {} time {:.1f}ms ns/node {} tt {:.0%} mode {} frozen {} fill {} ebf {:.2f} pv {}".format(
+            self.depth_reached, self.searched_nodes, self.search_time / 10 ** 6,
+            self.search_time // max(self.searched_nodes, 1), self.table.hit_rate(),
+            self.mode, len(self.frozen), self.fill_length, branching, " ".join(self.pv))
+
+    def new_ordering(self):
+        self.killers = [[None, None] for _ in self.killers]
+        self.history = [[value >> 1 for value in values] for values in self.history]
+
+    def order_moves(self, player, possible_moves, ply, stored_move, pv_move):
+        if not MOVE_ORDERING:
+            possible_moves.sort(key=lambda move: move[0] != stored_move)
+            possible_moves.sort(key=lambda move: move[0] != pv_move)
+            return possible_moves
+
+        killers = self.killers[ply]
+        history = self.history[player]
+
+        def score(move):
+            direction, row, col = move
+            if direction == pv_move:
+                return 1 << 62
+            if direction == stored_move:
+                return 1 << 61
+            value = history[row * self.width + col] + len(self.free_neighbors(row, col))
+            if direction in killers:
+                value += 1 << 60
+            return value
+
+        possible_moves.sort(key=score, reverse=True)
+        return possible_moves
+
+    def record_cutoff(self, player, ply, depth, direction, row, col):
+        killers = self.killers[ply]
+        if killers[0] != direction:
+            killers[1] = killers[0]
+            killers[0] = direction
+        self.history[player][row * self.width + col] += depth * depth
+
+    def table_cutoff(self, slot, depth, alpha, beta):
+        if self.table.depths[slot] < depth:
+            return False
+        stored_value = self.table.values[slot]
+        bound = self.table.bounds[slot]
+        return bound == EXACT or (bound == LOWER and stored_value >= beta) or (bound == UPPER and stored_value <= alpha)
+
+    def alphabeta(self, player, depth, deadline, alpha, beta, ply=0, on_pv=True):
+        self.searched_nodes += 1
+        self.pv_lines[ply] = []
         current_cell = self.players[player]
         possible_moves = self.free_neighbors(*current_cell)
         next_player = (player + 1) % len(self.players)
 
-        if depth <= 0 or perf_counter_ns() - timer > 95000:
+        if perf_counter_ns() > deadline:
+            raise SearchTimeout()
+
+        if depth <= 0:
             valuation = self.valuation()
             return valuation, "TOO DEEP"
 
+        on_pv = on_pv and ply < len(self.pv)
+        if player != self.me and SEARCH_MODE == BEST_REPLY:
+            return self.best_reply(player, depth, deadline, alpha, beta, ply, on_pv)
+
         if not possible_moves:
             last_row, last_col, last_content = self.update(player, -1, -1)
-            move_value, _ = self.alphabeta(next_player, depth - 1, timer, alpha, beta)
-            self.rollback(player, last_row, last_col, last_content)
+            try:
+                move_value, _ = self.alphabeta(next_player, depth - 1, deadline, alpha, beta, ply + 1, on_pv)
+            finally:
+                self.rollback(player, last_row, last_col, last_content)
+            self.pv_lines[ply] = ["DEAD PERSON"] + self.pv_lines[ply + 1]
             return move_value, "DEAD PERSON"
 
+        key = self.hash ^ self.turn_keys[player]
+        slot = self.table.probe(key)
+        stored_move = None
+        if slot is not None:
+            if self.table_cutoff(slot, depth, alpha, beta):
+                self.pv_lines[ply] = [self.table.moves[slot]]
+                return self.table.values[slot], self.table.moves[slot]
+            stored_move = self.table.moves[slot]
+        if len(possible_moves) > 1:
+            self.order_moves(player, possible_moves, ply, stored_move, self.pv[ply] if on_pv else None)
+
+        original_alpha, original_beta = alpha, beta
         maximising = player == self.me
         if maximising:
             value = -2
@@ -108,92 +509,510 @@ class Game:
             for direction, row, col in possible_moves:
 
                 last_row, last_col, last_content = self.update(player, row, col)
-                move_value, _ = self.alphabeta(next_player, depth - len(possible_moves), timer, alpha, beta)
-                self.rollback(player, last_row, last_col, last_content)
+                try:
+                    move_value, _ = self.alphabeta(next_player, depth - 1, deadline, alpha, beta, ply + 1, on_pv and direction == self.pv[ply])
+                finally:
+                    self.rollback(player, last_row, last_col, last_content)
 
                 if move_value > value:
                     value = move_value
-                    alpha = move_value
+                    alpha = max(alpha, move_value)
                     best_direction = direction
-                if alpha > beta:
+                    self.pv_lines[ply] = [direction] + self.pv_lines[ply + 1]
+                if alpha >= beta:
+                    self.record_cutoff(player, ply, depth, direction, row, col)
                     break
         else:
             value = 2
             best_direction = "GIVE UP"
+            if player in self.frozen:
+                possible_moves = [self.predicted_move(possible_moves)]
             for direction, row, col in possible_moves:
 
                 last_row, last_col, last_content = self.update(player, row, col)
-                move_value, _ = self.alphabeta(next_player, depth - 1, timer, alpha, beta)
-                self.rollback(player, last_row, last_col, last_content)
+                try:
+                    move_value, _ = self.alphabeta(next_player, depth - 1, deadline, alpha, beta, ply + 1, on_pv and direction == self.pv[ply])
+                finally:
+                    self.rollback(player, last_row, last_col, last_content)
 
                 if move_value < value:
                     value = move_value
-                    beta = move_value
+                    beta = min(beta, move_value)
                     best_direction = direction
-                if alpha > beta:
+                    self.pv_lines[ply] = [direction] + self.pv_lines[ply + 1]
+                if alpha >= beta:
+                    self.record_cutoff(player, ply, depth, direction, row, col)
                     break
+
+        if value <= original_alpha:
+            bound = UPPER
+        elif value >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, bound, value, best_direction)
         return value, best_direction
 
+    def best_reply(self, player, depth, deadline, alpha, beta, ply, on_pv):
+        layer = []
+        while player != self.me:
+            layer.append(player)
+            player = (player + 1) % len(self.players)
+
+        replies = [("{}:{}".format(replier, direction), replier, row, col) for replier in layer if replier not in self.frozen
+                   for direction, row, col in self.free_neighbors(*self.players[replier])]
+        if not replies:
+            replies = [("PREDICTED", None, -1, -1)]
+
+        key = self.hash ^ self.turn_keys[layer[0]]
+        slot = self.table.probe(key)
+        if slot is not None:
+            if self.table_cutoff(slot, depth, alpha, beta):
+                self.pv_lines[ply] = [self.table.moves[slot]]
+                return self.table.values[slot], self.table.moves[slot]
+            stored_move = self.table.moves[slot]
+            replies.sort(key=lambda reply: reply[0] != stored_move)
+        if on_pv:
+            pv_move = self.pv[ply]
+            replies.sort(key=lambda reply: reply[0] != pv_move)
+
+        original_alpha, original_beta = alpha, beta
+        value = 2
+        best_reply = "GIVE UP"
+        for reply, replier, row, col in replies:
+            undo = []
+            try:
+                for opponent in layer:
+                    if opponent == replier:
+                        move = row, col
+                    else:
+                        possible_moves = self.free_neighbors(*self.players[opponent])
+                        move = self.predicted_move(possible_moves)[1:] if possible_moves else DEAD
+                    undo.append((opponent, self.update(opponent, *move)))
+                move_value, _ = self.alphabeta(self.me, depth - 1, deadline, alpha, beta, ply + 1, on_pv and reply == self.pv[ply])
+            finally:
+                for opponent, last_state in reversed(undo):
+                    self.rollback(opponent, *last_state)
+
+            if move_value < value:
+                value = move_value
+                beta = min(beta, move_value)
+                best_reply = reply
+                self.pv_lines[ply] = [reply] + self.pv_lines[ply + 1]
+            if alpha >= beta:
+                break
+
+        if value <= original_alpha:
+            bound = UPPER
+        elif value >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, bound, value, best_reply)
+        return value, best_reply
+
+    def valuation(self):
+        return self.evaluator.evaluate(self.nodes, self.players, self.me)
+
+    def running(self):
+        return any(map(lambda player: player[0] > 0, self.players))
+
+
+class BitboardGame(Game):
+    def __init__(self, width, height, players_starting_positions, current_player):
+        self.width = width
+        self.height = height
+        self.full = (1 << (width * height)) - 1
+        first_column = sum(1 << (row * width) for row in range(height))
+        self.not_first_column = self.full & ~first_column
+        self.not_last_column = self.full & ~(first_column << (width - 1))
+        self.black = sum(1 << (row * width + col) for row in range(height) for col in range(width) if (row + col) % 2 == 0)
+        self.moves = [self.cell_moves(index // width, index % width) for index in range(width * height)]
+        self.trails = [0 for _ in players_starting_positions]
+        self.starts = list(players_starting_positions)
+        self.occupied = 0
+        self.fill_path = []
+        self.fill_improved = True
+        self.players = players_starting_positions
+        self.init_hashing()
+        for player, position in enumerate(players_starting_positions):
+            self.update(player, *position)
+        self.me = current_player
+
+    def cell_moves(self, row, col):
+        bit = 1 << (row * self.width + col)
+        shifted = [
+            ("RIGHT", 0, 1, (bit << 1) & self.not_first_column),
+            ("DOWN", 1, 0, (bit << self.width) & self.full),
+            ("LEFT", 0, -1, (bit >> 1) & self.not_last_column),
+            ("UP", -1, 0, bit >> self.width)
+        ]
+        return [(direction, row + diff_row, col + diff_col, mask) for direction, diff_row, diff_col, mask in shifted if mask]
+
+    def cell(self, row, col):
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return WALL
+        bit = 1 << (row * self.width + col)
+        if self.occupied & bit:
+            for player, trail in enumerate(self.trails):
+                if trail & bit and self.players[player] != DEAD:
+                    return PLAYERS_SYMBOLS[player]
+        return FREE
+
+    def free_neighbors(self, row, col):
+        if row < 0 or col < 0:
+            return []
+        occupied = self.occupied
+        return [(direction, move_row, move_col) for direction, move_row, move_col, mask in self.moves[row * self.width + col] if not occupied & mask]
+
+    def is_free(self, row, col):
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return False
+        return not self.occupied & (1 << (row * self.width + col))
+
+    def update(self, player, row, col):
+        last_row, last_col = self.players[player]
+        last_occupied = self.occupied
+
+        if row < 0 or col < 0:
+            if self.players[player] != DEAD:
+                self.occupied &= ~self.trails[player]
+            self.players[player] = DEAD
+        else:
+            bit = 1 << (row * self.width + col)
+            self.players[player] = row, col
+            self.trails[player] |= bit
+            self.occupied |= bit
+        self.rehash(player, last_row, last_col, *self.players[player])
+
+        return last_row, last_col, last_occupied
+
+    def rollback(self, player, row, col, occupied):
+        current_row, current_col = self.players[player]
+        self.rehash(player, row, col, current_row, current_col)
+        if current_row >= 0:
+            self.trails[player] &= ~(1 << (current_row * self.width + current_col))
+        self.occupied = occupied
+        self.players[player] = row, col
+
+    def state(self):
+        return tuple(self.players), tuple(self.trails), self.occupied
+
+    def load_state(self, players, trails, occupied):
+        self.players = list(players)
+        self.trails = list(trails)
+        self.occupied = occupied
+        self.hash = 0
+        for player, (row, col) in enumerate(self.players):
+            self.hash ^= self.head_key(player, row, col)
+            trail = self.trails[player]
+            while trail:
+                bit = trail & -trail
+                self.hash ^= self.trail_keys[bit.bit_length() - 1]
+                trail ^= bit
+
+    def expand(self, cells):
+        return (((cells << 1) & self.not_first_column)
+                | ((cells >> 1) & self.not_last_column)
+                | ((cells << self.width) & self.full)
+                | (cells >> self.width))
+
+    def frozen_players(self):
+        free = self.full & ~self.occupied
+        fronts = [0 if position == DEAD else 1 << (position[0] * self.width + position[1]) for position in self.players]
+        regions = list(fronts)
+        while any(fronts):
+            fronts = [self.expand(front) & free for front in fronts]
+            for player, front in enumerate(fronts):
+                regions[player] |= front
+                free &= ~front
+
+        mine = regions[self.me] | self.expand(regions[self.me])
+        return {player for player, region in enumerate(regions)
+                if player != self.me and self.players[player] != DEAD and not region & mine}
+
+    def book_frame(self):
+        start_row, start_col = self.starts[self.me]
+        return start_row * 2 >= self.height, start_col * 2 >= self.width
+
+    def book_cell(self, row, col, flip_rows, flip_cols):
+        return self.height - 1 - row if flip_rows else row, self.width - 1 - col if flip_cols else col
+
+    def book_key(self):
+        block = BOOK_BLOCKS.get(len(self.players))
+        if block is None:
+            return None
+        flip_rows, flip_cols = self.book_frame()
+        span = 2 * BOOK_MAX_TURNS + 1
+        blocks_per_row = -(-self.width // block)
+        key = 0
+        for offset in range(len(self.players)):
+            player = (self.me + offset) % len(self.players)
+            if self.players[player] == DEAD:
+                return None
+            keys = self.book_keys[offset]
+            start_row, start_col = self.book_cell(*self.starts[player], flip_rows, flip_cols)
+            key ^= keys[2 * span * span + start_row // block * blocks_per_row + start_col // block]
+            trail = self.trails[player]
+            while trail:
+                bit = trail & -trail
+                relative = self.book_offset(bit.bit_length() - 1, start_row, start_col, flip_rows, flip_cols)
+                if relative is None:
+                    return None
+                key ^= keys[relative]
+                trail ^= bit
+            head_row, head_col = self.players[player]
+            key ^= keys[span * span + self.book_offset(head_row * self.width + head_col, start_row, start_col, flip_rows, flip_cols)]
+        return key, flip_rows, flip_cols
+
+    def book_offset(self, index, start_row, start_col, flip_rows, flip_cols):
+        row, col = self.book_cell(*divmod(index, self.width), flip_rows, flip_cols)
+        row, col = row - start_row + BOOK_MAX_TURNS, col - start_col + BOOK_MAX_TURNS
+        span = 2 * BOOK_MAX_TURNS + 1
+        if not (0 <= row < span and 0 <= col < span):
+            return None
+        return row * span + col
+
+    def book_move(self):
+        if self.book is None or self.occupied.bit_count() > len(self.players) * BOOK_MAX_TURNS:
+            return None
+        book_key = self.book_key()
+        if book_key is None:
+            return None
+        key, flip_rows, flip_cols = book_key
+        move = self.book.lookup(key)
+        if move is None:
+            return None
+        direction = flip_direction(DIRECTIONS[move], flip_rows, flip_cols)
+        if direction not in [possible_move[0] for possible_move in self.free_neighbors(*self.players[self.me])]:
+            return None
+        return direction
+
+    def flood(self, cells, free):
+        region = 0
+        while cells:
+            region |= cells
+            cells = self.expand(cells) & free & ~region
+        return region
+
+    def separated(self):
+        row, col = self.players[self.me]
+        if row < 0:
+            return False
+        head = 1 << (row * self.width + col)
+        free = self.full & ~self.occupied
+        reach = self.expand(self.flood(self.expand(head) & free, free) | head)
+        return not any(player != self.me and position != DEAD and reach & (1 << (position[0] * self.width + position[1]))
+                       for player, position in enumerate(self.players))
+
+    def blocks(self, root, region):
+        cells = region | (1 << root)
+        neighbors = lambda index: [move_row * self.width + move_col for _, move_row, move_col, mask in self.moves[index] if cells & mask]
+        order = {root: 0}
+        low = {root: 0}
+        parent = {root: None}
+        visited = [root]
+        blocks = []
+        stack = [(root, iter(neighbors(root)))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in order:
+                    order[child] = low[child] = len(order)
+                    parent[child] = node
+                    visited.append(child)
+                    stack.append((child, iter(neighbors(child))))
+                    break
+                elif child != parent[node]:
+                    low[node] = min(low[node], order[child])
+            else:
+                stack.pop()
+                if stack:
+                    up = stack[-1][0]
+                    low[up] = min(low[up], low[node])
+                    if low[node] >= order[up]:
+                        block = 1 << up
+                        while True:
+                            index = visited.pop()
+                            block |= 1 << index
+                            if index == node:
+                                break
+                        blocks.append(block)
+        return blocks
+
+    def parity_bound(self, cells, entry):
+        black = (cells & self.black).bit_count()
+        white = cells.bit_count() - black
+        first, second = (white, black) if self.black >> entry & 1 else (black, white)
+        return 2 * second + 1 if first > second else 2 * first
+
+    def fill_bound(self, root, region):
+        blocks = self.blocks(root, region)
+        containing = {}
+        for block, cells in enumerate(blocks):
+            while cells:
+                bit = cells & -cells
+                containing.setdefault(bit.bit_length() - 1, []).append(block)
+                cells ^= bit
+        cuts = [[] for _ in blocks]
+        for index, owners in containing.items():
+            if len(owners) > 1:
+                for block in owners:
+                    cuts[block].append(index)
+
+        def longest(block, entry):
+            cells = blocks[block] & ~(1 << entry)
+            exits = [longest(other, cut) for cut in cuts[block] if cut != entry for other in containing[cut] if other != block]
+            return self.parity_bound(cells, entry) + max(exits, default=0)
+
+        return max((longest(block, root) for block in containing.get(root, [])), default=0)
+
+    def fill_moves(self, index, free):
+        moves = [(direction, move_row * self.width + move_col, mask) for direction, move_row, move_col, mask in self.moves[index] if free & mask]
+        moves.sort(key=lambda move: sum(1 for _, _, _, mask in self.moves[move[1]] if free & ~move[2] & mask))
+        return moves
+
+    def longest_fill(self, index, free, deadline, depth):
+        key = index, free
+        best = self.fill_memo.get(key)
+        if best is not None:
+            return best
+        self.searched_nodes += 1
+        if not self.searched_nodes & 255 and (perf_counter_ns() > deadline or self.searched_nodes > FILL_NODE_LIMIT):
+            raise SearchTimeout()
+        if depth > self.fill_length:
+            self.fill_length = depth
+            self.fill_path = list(self.fill_stack)
+
+        best = 0
+        limit = self.fill_limit - depth
+        if depth + self.parity_bound(free, index) <= self.fill_length:
+            limit = 0
+        for direction, next_index, mask in self.fill_moves(index, free):
+            if best >= limit or self.fill_length >= self.fill_limit:
+                break
+            self.fill_stack.append(direction)
+            best = max(best, 1 + self.longest_fill(next_index, free & ~mask, deadline, depth + 1))
+            self.fill_stack.pop()
+        self.fill_memo[key] = best
+        return best
+
+    def follows(self, index, path, free):
+        for direction in path:
+            for move_direction, move_row, move_col, mask in self.moves[index]:
+                if move_direction == direction and free & mask:
+                    index = move_row * self.width + move_col
+                    free &= ~mask
+                    break
+            else:
+                return False
+        return True
+
+    def endgame(self, deadline, start):
+        row, col = self.players[self.me]
+        root = row * self.width + col
+        free = self.full & ~self.occupied
+        region = self.flood(self.expand(1 << root) & free, free)
+        self.mode = ENDGAME
+        self.fill_limit = self.fill_bound(root, region)
+        self.fill_memo = {}
+        self.fill_stack = []
+        self.fill_path = self.fill_path[1:] if self.follows(root, self.fill_path[1:], region) else []
+        seed_length = self.fill_length = len(self.fill_path)
+        if not self.fill_path or self.fill_improved and seed_length < self.fill_limit - 1:
+            try:
+                self.longest_fill(root, region, min(deadline, start + ENDGAME_BUDGET_NS), 0)
+            except SearchTimeout:
+                pass
+            self.fill_improved = self.fill_length > seed_length
+        self.fill_memo = {}
+        self.pv = self.fill_path[:1] or ["GIVE UP"]
+        self.search_time = perf_counter_ns() - start
+        return self.fill_length, self.pv[0]
+
     def valuation(self):
         my_value = 0
         enemy_value = 0
-        queues = list()
-        positions = list(filter(lambda player: player != DEAD, self.players))
-
-        saved_nodes = [[content for content in row] for row in self.nodes]
-
-        for cell in positions:
-            queue = Queue()
-            queue.put_nowait(cell)
-            queues.append(queue)
-
-        while not all(map(lambda queue: queue.empty(), queues)):
-            for player, queue in enumerate(queues):
-                if queue.empty():
-                    continue
-                if self.players[player][0] == -1:
-                    item_row, item_col = queue.get_nowait()
-                    self.nodes[item_row][item_col] = FREE
-                    continue
-                symbol = PLAYERS_SYMBOLS[player]
-                item_row, item_col = queue.get_nowait()
-                for _, neighbor_row, neighbor_col in self.free_neighbors(item_row, item_col):
-                    self.nodes[neighbor_row][neighbor_col] = symbol
-
-                    queue.put_nowait((neighbor_row, neighbor_col))
-                    if player == self.me:
-                        my_value += 1
-                    else:
-                        enemy_value += 1
+        free = self.full & ~self.occupied
+        fronts = [0 if position == DEAD else 1 << (position[0] * self.width + position[1]) for position in self.players]
+
+        while any(fronts):
+            reached = [self.expand(front) & free for front in fronts]
+            seen = 0
+            contested = 0
+            for cells in reached:
+                contested |= seen & cells
+                seen |= cells
+            free &= ~seen
+            for player, cells in enumerate(reached):
+                fronts[player] = cells & ~contested
+                if player == self.me:
+                    my_value += fronts[player].bit_count()
+                else:
+                    enemy_value += fronts[player].bit_count()
 
-        self.nodes = saved_nodes
         return (my_value - enemy_value) / (my_value + enemy_value + 1)
 
-    def running(self):
-        return any(map(lambda player: player[0] > 0, self.players))
+
+worker_game = None
+
+
+def init_worker(width, height, players, me):
+    global worker_game
+    worker_game = BitboardGame(width, height, list(players), me)
 
 
-def parse_input():
+def search_root_move(task):
+    (players, trails, occupied), direction, row, col, deadline = task
+    worker_game.load_state(players, trails, occupied)
+    worker_game.update(worker_game.me, row, col)
+    worker_game.search(deadline, (worker_game.me + 1) % len(worker_game.players))
+    table = worker_game.table
+    return worker_game.depth_values, direction, worker_game.searched_nodes, table.probes, table.hits
+
+
+def parse_input(profiler):
     while True:
         nb_players, player_index = [int(i) for i in input().split()]
+        profiler.start()
         for player in range(nb_players):
             _, _, col, row = [int(i) for i in input().split()]
-            print((player, row, col), file=sys.stderr)
+            if DEBUG:
+                print((player, row, col), file=sys.stderr)
             yield player, row, col
 
 
-nb_players, player_index = [int(i) for i in input().split()]
-players = []
-for player in range(nb_players):
-    col, row, _, _ = [int(i) for i in input().split()]
-    players.append((row, col))
+def main():
+    sys.setrecursionlimit(10 ** 4)
+    nb_players, player_index = [int(i) for i in input().split()]
+    players = []
+    for player in range(nb_players):
+        col, row, _, _ = [int(i) for i in input().split()]
+        players.append((row, col))
 
-game = Game(30, 20, players, player_index)
+    game = BitboardGame(30, 20, players, player_index)
+    game.book = open_book(BOOK_PATH, 30, 20)
+    pool = multiprocessing.Pool(WORKERS, init_worker, (30, 20, players, player_index)) if WORKERS else None
 
-inputs = parse_input()
-while True:
-    value, direction = game.alphabeta(player_index, 25, perf_counter_ns(), -2, 2)
-    print(direction)
-    for player in range(nb_players):
-        game.update(*next(inputs))
-    print(game, file=sys.stderr)
\ No newline at end of file
+    profiler = Profiler()
+    inputs = parse_input(profiler)
+    while True:
+        deadline = perf_counter_ns() + TURN_BUDGET_NS
+        value, direction = game.search_parallel(pool, deadline) if pool else game.search(deadline)
+        profiler.lap("search")
+        print(direction)
+        profiler.lap("output")
+        print(game.search_report(), file=sys.stderr)
+        if PROFILE:
+            profiler.count("nodes", game.searched_nodes)
+            profiler.count("depth", game.depth_reached)
+            print(profiler.report(), file=sys.stderr)
+        for player in range(nb_players):
+            game.update(*next(inputs))
+        profiler.lap("parse")
+        if DEBUG:
+            print(game, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
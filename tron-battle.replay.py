@@ -0,0 +1,172 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+
+spec = importlib.util.spec_from_file_location("tron_battle", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tron-battle.py"))
+tron = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tron)
+
+WIDTH = 30
+HEIGHT = 20
+DIRECTIONS = {"RIGHT": (0, 1), "DOWN": (1, 0), "LEFT": (0, -1), "UP": (-1, 0)}
+
+
+def configure(depth, budget_ms):
+    if depth:
+        tron.MAX_DEPTH = depth
+        tron.TURN_BUDGET_NS = 10 ** 15
+        tron.ENDGAME_BUDGET_NS = 10 ** 15
+    else:
+        tron.TURN_BUDGET_NS = budget_ms * 10 ** 6
+
+
+def replay(path):
+    moves = io.StringIO()
+    logs = io.StringIO()
+    with open(path) as transcript, contextlib.redirect_stdout(moves), contextlib.redirect_stderr(logs):
+        stdin, sys.stdin = sys.stdin, transcript
+        try:
+            tron.main()
+        except EOFError:
+            pass
+        finally:
+            sys.stdin = stdin
+
+    reports = [line.split() for line in logs.getvalue().splitlines() if line.startswith("depth ")]
+    played = moves.getvalue().splitlines()
+    assert len(played) == len(reports), "{}: {} moves but {} search reports".format(path, len(played), len(reports))
+    turns = []
+    for move, report in zip(played, reports):
+        fields = dict(zip(report[0::2], report[1::2]))
+        turns.append({
+            "move": move,
+            "depth": int(fields["depth"]),
+            "nodes": int(fields["nodes"]),
+            "time_ms": float(fields["time"][:-2]),
+            "mode": fields["mode"],
+            "fill": int(fields["fill"]),
+        })
+    return turns
+
+
+def summary(turns):
+    searched = [turn for turn in turns if turn.get("mode") not in (tron.ENDGAME, tron.BOOK)]
+    nodes = sum(turn["nodes"] for turn in searched)
+    time_ms = sum(turn["time_ms"] for turn in searched)
+    return {
+        "turns": len(turns),
+        "endgame_turns": sum(turn.get("mode") == tron.ENDGAME for turn in turns),
+        "nodes": nodes,
+        "time_ms": round(time_ms, 3),
+        "mean_depth": round(sum(turn["depth"] for turn in searched) / max(len(searched), 1), 2),
+        "nodes_per_s": round(nodes / time_ms * 1000) if time_ms else 0,
+    }
+
+
+def compare(name, turns, baseline, tolerance):
+    problems = []
+    current, previous = summary(turns), summary(baseline)
+    if current["nodes_per_s"] < previous["nodes_per_s"] * (1 - tolerance):
+        problems.append("{}: speed {} -> {} nodes/s".format(name, previous["nodes_per_s"], current["nodes_per_s"]))
+    if current["mean_depth"] < previous["mean_depth"] * (1 - tolerance):
+        problems.append("{}: mean depth {} -> {}".format(name, previous["mean_depth"], current["mean_depth"]))
+    for turn, (now, before) in enumerate(zip(turns, baseline), start=1):
+        if now["move"] != before["move"]:
+            problems.append("{}: turn {} move {} -> {}".format(name, turn, before["move"], now["move"]))
+    if len(turns) != len(baseline):
+        problems.append("{}: {} turns instead of {}".format(name, len(turns), len(baseline)))
+    return problems
+
+
+def record(path, nb_players, seed, depth):
+    configure(depth, None)
+    rng = random.Random(seed)
+    cells = [(row, col) for row in range(HEIGHT) for col in range(WIDTH)]
+    starts = rng.sample(cells, nb_players)
+    games = [tron.BitboardGame(WIDTH, HEIGHT, list(starts), player) for player in range(nb_players)]
+    referee = games[0]
+    lines = []
+
+    def snapshot():
+        lines.append("{} 0".format(nb_players))
+        for player, (start_row, start_col) in enumerate(starts):
+            row, col = referee.players[player]
+            if (row, col) == tron.DEAD:
+                lines.append("-1 -1 -1 -1")
+            else:
+                lines.append("{} {} {} {}".format(start_col, start_row, col, row))
+
+    snapshot()
+    while sum(position != tron.DEAD for position in referee.players) > 1:
+        for player, game in enumerate(games):
+            if game.players[player] == tron.DEAD:
+                continue
+            _, direction = game.search(tron.perf_counter_ns() + tron.TURN_BUDGET_NS)
+            row, col = game.players[player]
+            diff_row, diff_col = DIRECTIONS.get(direction, (-row - 1, -col - 1))
+            row, col = row + diff_row, col + diff_col
+            if not referee.is_free(row, col):
+                row, col = tron.DEAD
+            for other in games:
+                other.update(player, row, col)
+        snapshot()
+
+    with open(path, "w") as transcript:
+        transcript.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Tron transcripts through the bot and compare against a baseline.")
+    parser.add_argument("transcripts", nargs="*")
+    parser.add_argument("--depth", type=int, help="fixed search depth instead of the time budget, for reproducible runs")
+    parser.add_argument("--budget-ms", type=int, default=tron.TURN_BUDGET_NS // 10 ** 6)
+    parser.add_argument("--save", help="write this run as a baseline")
+    parser.add_argument("--baseline", help="compare this run against a stored baseline")
+    parser.add_argument("--mode", choices=[tron.PARANOID, tron.BEST_REPLY], default=tron.SEARCH_MODE, help="multi-player search mode")
+    parser.add_argument("--no-ordering", action="store_true", help="disable killer/history move ordering to compare node counts")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown")
+    parser.add_argument("--record", metavar="PATH", help="record a self-play transcript instead of replaying")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    tron.SEARCH_MODE = arguments.mode
+    tron.MOVE_ORDERING = not arguments.no_ordering
+
+    if arguments.record:
+        record(arguments.record, arguments.players, arguments.seed, arguments.depth or 4)
+        return 0
+
+    configure(arguments.depth, arguments.budget_ms)
+    runs = {}
+    for path in arguments.transcripts:
+        turns = replay(path)
+        runs[os.path.basename(path)] = turns
+        print("{:<32} {}".format(os.path.basename(path), json.dumps(summary(turns))))
+        for turn, stats in enumerate(turns, start=1):
+            print("  turn {:>3} {:<11} depth {:>2} fill {:>3} nodes {:>7} {:>7.1f}ms {}".format(
+                turn, stats["move"], stats["depth"], stats["fill"], stats["nodes"], stats["time_ms"], stats["mode"]))
+
+    if arguments.save:
+        with open(arguments.save, "w") as output:
+            json.dump({"depth": arguments.depth, "runs": runs}, output, indent=1)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        problems = []
+        for name, turns in runs.items():
+            if name in baseline["runs"]:
+                problems += compare(name, turns, baseline["runs"][name], arguments.tolerance)
+        for problem in problems:
+            print("REGRESSION " + problem)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,12 @@
 import random
 import sys
-from collections import defaultdict
+from array import array
+from collections import deque
+from time import perf_counter_ns
 
-width, height = [int(i) for i in input().split()]
+read_line = sys.stdin.buffer.readline
+
+width, height = [int(i) for i in read_line().split()]
 
 NONE = -1
 ROBOT_ALLY = 0
@@ -11,6 +15,67 @@ HOLE = 1
 RADAR = 2
 TRAP = 3
 AMADEUSIUM = 4
+UNKNOWN = 255
+
+HISTORY_LENGTH = 8
+ENEMY_CARRY_PRIOR = 0.5
+TRAP_THRESHOLD = ENEMY_CARRY_PRIOR / 5
+
+RADAR_RANGE = 4
+RADAR_RISK_WEIGHT = 20
+RADAR_TRAVEL_WEIGHT = 1
+MIN_RADAR_GAIN = 8
+
+PLANNER = False
+PLAN_BUDGET_NS = 35 * 10 ** 6
+PLAN_HORIZON = 12
+PLAN_CANDIDATES = 4
+PLAN_UNEXPLORED = 2
+MOVE_RANGE = 4
+COOLDOWN = 5
+CARRY_VALUE = 0.8
+UNKNOWN_ORE_VALUE = 0.3
+RADAR_CELL_VALUE = 0.05
+TRAP_PENALTY = 20
+DISTANCE_PENALTY = 0.01
+MINE = "mine"
+PLACE_RADAR = "radar"
+IDLE = "idle"
+
+DEBUG = False
+PROFILE = True
+PROFILE_HISTORY = 200
+
+
+class Profiler:
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.last = perf_counter_ns()
+
+    def start(self):
+        self.last = perf_counter_ns()
+
+    def lap(self, phase):
+        now = perf_counter_ns()
+        timings = self.timings.get(phase)
+        if timings is None:
+            timings = self.timings[phase] = deque(maxlen=PROFILE_HISTORY)
+        timings.append(now - self.last)
+        self.last = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        parts = ["profile ms p50/p99"]
+        for phase, timings in self.timings.items():
+            ordered = sorted(timings)
+            parts.append("{} {:.2f}/{:.2f}".format(phase, ordered[len(ordered) // 2] / 10 ** 6, ordered[len(ordered) * 99 // 100] / 10 ** 6))
+        for name, value in self.counters.items():
+            parts.append("{} {}".format(name, value))
+        self.counters = {}
+        return " ".join(parts)
 
 
 class Pos:
@@ -24,6 +89,9 @@ class Pos:
     def __str__(self):
         return str((self.x, self.y))
 
+    def __repr__(self):
+        return str((self.x, self.y))
+
 
 class Entity(Pos):
     def __init__(self, x, y, type, id):
@@ -70,41 +138,163 @@ class Robot(Entity):
             raise Exception(f"Unknown item {requested_item}")
 
 
-class Cell(Pos):
-    def __init__(self, x, y, amadeusium, hole):
-        super().__init__(x, y)
-        self.amadeusium = amadeusium
-        self.hole = hole
-        self._potential_trap = False
+def diamond(x, y, radius):
+    cells = []
+    for m in range(max(0, y - radius), min(height, y + radius + 1)):
+        reach = radius - abs(y - m)
+        for n in range(max(0, x - reach), min(width, x + reach + 1)):
+            cells.append(n + width * m)
+    return cells
 
-    def set_potential_trap(self):
-        if self.hole:
-            self._potential_trap = True
 
-    def has_hole(self):
-        return self.hole == HOLE
+class Grid:
+    def __init__(self):
+        self.positions = [Pos(index % width, index // width) for index in range(width * height)]
+        self.amadeusium = bytearray([UNKNOWN]) * (width * height)
+        self.holes = bytearray(width * height)
+        self.trap_likelihood = array("d", [0.0]) * (width * height)
+        self.rows = [b""] * height
+        self.dirty = []
+        self.traps = 0
+        self.radars = 0
+
+    def update_row(self, y, line):
+        if line == self.rows[y]:
+            return
+        self.rows[y] = line
+        values = line.split()
+        for x in range(width):
+            index = x + width * y
+            amadeusium = UNKNOWN if values[2 * x] == b"?" else int(values[2 * x])
+            hole = values[2 * x + 1] == b"1"
+            if self.amadeusium[index] != amadeusium or self.holes[index] != hole:
+                self.amadeusium[index] = amadeusium
+                self.holes[index] = hole
+                self.dirty.append(index)
+
+    def raise_trap_likelihood(self, index, probability):
+        self.trap_likelihood[index] = 1 - (1 - self.trap_likelihood[index]) * (1 - probability)
+        self.dirty.append(index)
+
+    def potential_trap(self, index):
+        return self.trap_likelihood[index] >= TRAP_THRESHOLD
+
+    def clear_items(self):
+        self.traps = 0
+        self.radars = 0
+
+    def add_trap(self, x, y):
+        self.traps |= 1 << (x + width * y)
+
+    def add_radar(self, x, y):
+        self.radars |= 1 << (x + width * y)
+
+
+class RadarPlanner:
+    def __init__(self, grid):
+        self.grid = grid
+        self.coverage = [diamond(cell.x, cell.y, RADAR_RANGE) for cell in grid.positions]
+        self.unknown = bytearray(grid.amadeusium[index] == UNKNOWN for index in range(width * height))
+        self.gains = array("i", (sum(self.unknown[covered] for covered in cells) for cells in self.coverage))
+        self.candidates = [n + width * m for n in range(5, width - 2) for m in range(3, height - 3)]
+
+    def update(self, indexes):
+        for index in indexes:
+            unknown = self.grid.amadeusium[index] == UNKNOWN
+            if unknown != self.unknown[index]:
+                self.unknown[index] = unknown
+                change = 1 if unknown else -1
+                for candidate in self.coverage[index]:
+                    self.gains[candidate] += change
+
+    def score(self, index):
+        return (self.gains[index]
+                - RADAR_RISK_WEIGHT * self.grid.trap_likelihood[index]
+                - RADAR_TRAVEL_WEIGHT * -(-(index % width) // 4))
+
+    def best_spot(self):
+        grid = self.grid
+        best, best_score = None, None
+        for index in self.candidates:
+            if self.gains[index] < MIN_RADAR_GAIN or grid.traps >> index & 1 or grid.potential_trap(index):
+                continue
+            score = self.score(index)
+            if best_score is None or score > best_score:
+                best, best_score = index, score
+        return None if best is None else grid.positions[best]
+
+
+class SpotIndex:
+    def __init__(self, spots):
+        self.columns = [dict() for _ in range(width)]
+        self.size = 0
+        for spot in spots:
+            self.add(spot)
+
+    def add(self, spot):
+        self.columns[spot.x][spot.y] = spot
+        self.size += 1
+
+    def remove(self, spot):
+        del self.columns[spot.x][spot.y]
+        self.size -= 1
+
+    def nearest(self, position):
+        best = None
+        best_key = None
+        for dx in range(width):
+            if best_key is not None and dx > best_key[0]:
+                break
+            for x in {position.x - dx, position.x + dx}:
+                if not width > x >= 0:
+                    continue
+                for y, spot in self.columns[x].items():
+                    key = (dx + abs(y - position.y), x, y)
+                    if best_key is None or key < best_key:
+                        best, best_key = spot, key
+        return best
 
-    def update(self, amadeusium, hole):
-        self.amadeusium = amadeusium
-        self.hole = hole
+    def copy(self):
+        index = SpotIndex([])
+        index.columns = [dict(column) for column in self.columns]
+        index.size = self.size
+        return index
 
-    def __str__(self):
-        return "cell:[{},{},{}]".format(self.amadeusium, self.hole, super().__str__())
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for column in self.columns:
+            yield from column.values()
 
     def __repr__(self):
-        return "cell:[{},{},{}]".format(self.amadeusium, self.hole, super().__str__())
+        return repr(list(self))
 
-class Grid:
-    def __init__(self):
-        self.cells = []
-        for y in range(height):
-            for x in range(width):
-                self.cells.append(Cell(x, y, 0, 0))
 
-    def get_cell(self, x, y):
-        if width > x >= 0 and height > y >= 0:
-            return self.cells[x + width * y]
-        return Cell(x, y, 0, 0)
+class EnemyRobot:
+    def __init__(self, robot):
+        self.xs = array("b", [0]) * HISTORY_LENGTH
+        self.ys = array("b", [0]) * HISTORY_LENGTH
+        self.head = -1
+        self.count = 0
+        self.carry = ENEMY_CARRY_PRIOR
+        self.push(robot)
+
+    def push(self, robot):
+        self.head = (self.head + 1) % HISTORY_LENGTH
+        self.xs[self.head] = robot.x
+        self.ys[self.head] = robot.y
+        self.count = min(self.count + 1, HISTORY_LENGTH)
+        self.robot = robot
+
+    def position(self, age=0):
+        if age >= self.count:
+            return None
+        index = (self.head - age) % HISTORY_LENGTH
+        return self.xs[index], self.ys[index]
+
+    def stationary(self):
+        return self.count >= 2 and self.position(0) == self.position(1) and not self.robot.is_dead()
 
 
 class Game:
@@ -114,20 +304,21 @@ class Game:
             self.my_robots.append(Robot(x, y, type, id, item))
         elif type == ROBOT_ENEMY:
             current = Robot(x, y, type, id, item)
-            if self.enemy_history[id]:
-                previous = self.enemy_history[id][0]
-                if previous.x == current.x and previous.y == current.y:
-                    self.grid.get_cell(current.x, current.y).set_potential_trap()
-                    self.grid.get_cell(current.x + 1, current.y).set_potential_trap()
-                    self.grid.get_cell(current.x, current.y + 1).set_potential_trap()
-                    self.grid.get_cell(current.x - 1, current.y).set_potential_trap()
-                    self.grid.get_cell(current.x, current.y + 1).set_potential_trap()
-            self.enemy_history[id].insert(0, current)
+            enemy = self.enemies.get(id)
+            if enemy is None:
+                self.enemies[id] = EnemyRobot(current)
+            else:
+                enemy.push(current)
+                if enemy.stationary():
+                    self.observe_stationary_enemy(enemy)
         elif type == TRAP:
-            print(entity, file=sys.stderr)
+            if DEBUG:
+                print(entity, file=sys.stderr)
             self.traps.append(entity)
+            self.grid.add_trap(x, y)
         elif type == RADAR:
             self.radars.append(entity)
+            self.grid.add_radar(x, y)
 
     def __init__(self):
         self.turn = 0
@@ -142,31 +333,37 @@ class Game:
         self.seeking_radar = False
         self.seeking_trap = False
         self.awaiting_trap = False
-        self.enemy_history = defaultdict(lambda: list())
+        self.enemies = {}
+        self.radar_planner = RadarPlanner(self.grid)
+        self.radar_spot = None
+        self.previous_traps = 0
+        self.spot_kinds = bytearray(width * height)
+        self.safe_spots = SpotIndex([])
+        self.unsafe_spots = SpotIndex([])
+
+    def observe_stationary_enemy(self, enemy):
+        x, y = enemy.position()
+        if x == 0:
+            enemy.carry = 1.0
+            return
+        candidates = []
+        for n, m in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if width > n >= 0 and height > m >= 0 and self.grid.holes[n + width * m]:
+                candidates.append(n + width * m)
+        if not candidates:
+            return
+        for index in candidates:
+            self.grid.raise_trap_likelihood(index, enemy.carry / len(candidates))
+        enemy.carry = 0.0
 
     def first_radar_spot(self):
-        for n in range(5, width-2):
-            for m in range(3, height-3):
-                cell = self.grid.get_cell(n, m)
-                if self.is_trap(cell):
-                    continue
-                if cell._potential_trap:
-                    continue
-                radar_distances = list(map(lambda radar: cell.distance(radar), self.radars))
-                if not radar_distances:
-                    return cell
-                elif min(radar_distances) > 6:
-                    return cell
-        return None
-
-    def is_trap(self, cell):
-        return (cell.x, cell.y) in map(lambda trap: (trap.x, trap.y), self.traps)
+        return self.radar_spot
 
     def ratio_mine_vs_them_is_over(self, ratio):
         enemy_robots_in_range = 0
         my_robots_in_range = 0
 
-        for robot in [value[0] for value in self.enemy_history.values()]:
+        for robot in self.enemy_robots():
             for trap in self.traps:
                 if robot.distance(trap) < 2:
                     enemy_robots_in_range += 1
@@ -197,31 +394,34 @@ class Game:
             return False
         return (self.my_score + (nb_my_robots * 2)) > (self.enemy_score + (nb_enemy_robots * 2) + 10)
 
-    def nearest_amadeusium_spot(self, position):
-        print(self.safe_amadeusium_spots, file=sys.stderr)
-        print(self.unsafe_amadeusium_spots, file=sys.stderr)
-        safe_amadeusium_spots_distances = list(map(lambda spot: position.distance(spot), self.safe_amadeusium_spots))
-        unsafe_amadeusium_spots_distances = list(map(lambda spot: position.distance(spot), self.unsafe_amadeusium_spots))
+    def beginning(self):
+        return self.turn < 66
 
-        spots = [None, None]
-        if safe_amadeusium_spots_distances:
-            spots[0] = self.safe_amadeusium_spots[safe_amadeusium_spots_distances.index(min(safe_amadeusium_spots_distances))]
+    def claim_nearest(self, spots, robot):
+        spot = spots.nearest(robot)
+        if spot is not None:
+            spots.remove(spot)
+        return spot
 
-        if unsafe_amadeusium_spots_distances:
-            spots[1] = self.unsafe_amadeusium_spots[unsafe_amadeusium_spots_distances.index(min(unsafe_amadeusium_spots_distances))]
-
-        return spots
+    def amadeusium_spots_for(self, robot):
+        safe_amadeusium = self.claim_nearest(self.safe_amadeusium_spots, robot)
+        unsafe_amadeusium = None
+        if not self.beginning():
+            unsafe_amadeusium = self.claim_nearest(self.unsafe_amadeusium_spots, robot)
+        return safe_amadeusium, unsafe_amadeusium
 
     def near_HQ(self, robot):
         return robot.x == min(map(lambda robot: robot.x, filter(lambda robot: not robot.is_dead(), self.my_robots)))
 
     def enemy_robots(self):
-        return [value[0] for value in self.enemy_history.values()]
+        return [enemy.robot for enemy in self.enemies.values()]
 
     def next_turn(self):
         self.radars = []
         self.traps = []
         self.my_robots = []
+        self.previous_traps = self.grid.traps
+        self.grid.clear_items()
 
         self.seeking_radar = False
         self.seeking_trap = False
@@ -230,15 +430,43 @@ class Game:
         self.turn += 1
 
     def compute_strat(self):
-        cells = [self.grid.get_cell(n, m) for n in range(width) for m in range(height)]
-        amadeusium_spots = list(
-            filter(lambda cell: cell.amadeusium != "?" and int(cell.amadeusium) > 0 and not self.is_trap(cell), cells))
-        self.safe_amadeusium_spots = list(filter(lambda cell: not cell._potential_trap, amadeusium_spots))
-        self.unsafe_amadeusium_spots = list(filter(lambda cell: cell._potential_trap, amadeusium_spots))
-        print("traps " + str(self.traps), file=sys.stderr)
-        print("next turn " + str(amadeusium_spots), file=sys.stderr)
-        print("next turn " + str(self.safe_amadeusium_spots), file=sys.stderr)
-        print("next turn " + str(self.unsafe_amadeusium_spots), file=sys.stderr)
+        grid = self.grid
+        changed_traps = grid.traps ^ self.previous_traps
+        while changed_traps:
+            bit = changed_traps & -changed_traps
+            grid.dirty.append(bit.bit_length() - 1)
+            changed_traps ^= bit
+
+        for index in grid.dirty:
+            amadeusium = grid.amadeusium[index]
+            if amadeusium == UNKNOWN or amadeusium == 0 or grid.traps >> index & 1:
+                kind = 0
+            elif grid.potential_trap(index):
+                kind = 2
+            else:
+                kind = 1
+            if kind != self.spot_kinds[index]:
+                spot = grid.positions[index]
+                if self.spot_kinds[index] == 1:
+                    self.safe_spots.remove(spot)
+                elif self.spot_kinds[index] == 2:
+                    self.unsafe_spots.remove(spot)
+                if kind == 1:
+                    self.safe_spots.add(spot)
+                elif kind == 2:
+                    self.unsafe_spots.add(spot)
+                self.spot_kinds[index] = kind
+        self.radar_planner.update(grid.dirty)
+        grid.dirty = []
+        self.radar_spot = self.radar_planner.best_spot()
+
+        self.safe_amadeusium_spots = self.safe_spots.copy()
+        self.unsafe_amadeusium_spots = self.unsafe_spots.copy()
+        if DEBUG:
+            print("traps " + str(self.traps), file=sys.stderr)
+            print("next turn " + str(list(self.safe_spots) + list(self.unsafe_spots)), file=sys.stderr)
+            print("next turn " + str(self.safe_amadeusium_spots), file=sys.stderr)
+            print("next turn " + str(self.unsafe_amadeusium_spots), file=sys.stderr)
 
 
 
@@ -248,15 +476,9 @@ def apply_strategy(game, robot):
         return
 
     ending = game.turn > 122
-    beginning = game.turn < 66
 
     winning = game.winning()
-    safe_amadeusium, unsafe_amadeusium = game.nearest_amadeusium_spot(robot)
-    safe_amadeusium, unsafe_amadeusium = safe_amadeusium, None if beginning else unsafe_amadeusium
-    if safe_amadeusium:
-        game.safe_amadeusium_spots.remove(safe_amadeusium)
-    if unsafe_amadeusium:
-        game.unsafe_amadeusium_spots.remove(unsafe_amadeusium)
+    safe_amadeusium, unsafe_amadeusium = game.amadeusium_spots_for(robot)
     radar_spot = game.first_radar_spot() or safe_amadeusium or unsafe_amadeusium
     amadeusium = safe_amadeusium or unsafe_amadeusium
     near_HQ = game.near_HQ(robot)
@@ -306,24 +528,229 @@ def find_opportunity_trap(game, near_traps, robot, unsafe_amadeusium):
     return opportunity_trap
 
 
+class Snapshot:
+    def __init__(self, grid, gains, ore, traps, radars, robots, cooldowns, value):
+        self.grid = grid
+        self.gains = gains
+        self.ore = ore
+        self.traps = traps
+        self.radars = radars
+        self.robots = robots
+        self.cooldowns = cooldowns
+        self.value = value
+
+    def fork(self):
+        return Snapshot(self.grid, self.gains, dict(self.ore), self.traps, self.radars,
+                        [list(robot) for robot in self.robots], list(self.cooldowns), self.value)
+
+    def amadeusium(self, index):
+        return self.ore.get(index, self.grid.amadeusium[index])
+
+    def done(self, task):
+        kind, index = task
+        if kind == MINE:
+            amadeusium = self.amadeusium(index)
+            return (amadeusium == 0 or self.traps >> index & 1 == 1
+                    or amadeusium == UNKNOWN and self.grid.holes[index] == 1)
+        if kind == PLACE_RADAR:
+            return self.radars >> index & 1 == 1
+        return True
+
+    def act(self, robot, task):
+        x, y, item, _ = robot
+        kind, index = task
+        if x < 0:
+            return "WAIT", 0, 0
+        if item == AMADEUSIUM:
+            return "MOVE", 0, y
+        if self.done(task):
+            return "WAIT", 0, 0
+        if kind == PLACE_RADAR and item != RADAR:
+            if x > 0:
+                return "MOVE", 0, y
+            return ("REQUEST", RADAR, 0) if self.cooldowns[0] == 0 else ("WAIT", 0, 0)
+        target_x, target_y = index % width, index // width
+        if abs(x - target_x) + abs(y - target_y) <= 1:
+            return "DIG", target_x, target_y
+        return "MOVE", target_x, target_y
+
+    def step(self, tasks):
+        commands = []
+        grid = self.grid
+        for robot, task in zip(self.robots, tasks):
+            command = self.act(robot, task)
+            commands.append(command)
+            action, x, y = command
+            if action == "MOVE":
+                steps = MOVE_RANGE
+                horizontal = min(steps, abs(x - robot[0]))
+                robot[0] += horizontal if x > robot[0] else -horizontal
+                steps -= horizontal
+                vertical = min(steps, abs(y - robot[1]))
+                robot[1] += vertical if y > robot[1] else -vertical
+            elif action == "DIG":
+                index = x + width * y
+                if self.traps >> index & 1:
+                    robot[:] = [-1, -1, NONE, 0.0]
+                    self.value -= TRAP_PENALTY
+                    continue
+                self.value -= TRAP_PENALTY * grid.trap_likelihood[index]
+                if robot[2] == RADAR:
+                    self.radars |= 1 << index
+                    self.value += RADAR_CELL_VALUE * self.gains[index]
+                    robot[2] = NONE
+                elif robot[2] == TRAP:
+                    self.traps |= 1 << index
+                    robot[2] = NONE
+                else:
+                    amadeusium = self.amadeusium(index)
+                    if amadeusium == UNKNOWN:
+                        self.ore[index] = 0
+                        robot[2], robot[3] = AMADEUSIUM, UNKNOWN_ORE_VALUE
+                    elif amadeusium > 0:
+                        self.ore[index] = amadeusium - 1
+                        robot[2], robot[3] = AMADEUSIUM, 1.0
+            elif action == "REQUEST":
+                robot[2] = x
+                self.cooldowns[x == TRAP] = COOLDOWN
+        for robot in self.robots:
+            if robot[0] == 0 and robot[2] == AMADEUSIUM:
+                self.value += robot[3]
+                robot[2], robot[3] = NONE, 0.0
+        self.cooldowns = [max(0, cooldown - 1) for cooldown in self.cooldowns]
+        return commands
+
+    def score(self, tasks):
+        value = self.value
+        for robot, task in zip(self.robots, tasks):
+            if robot[0] < 0:
+                continue
+            if robot[2] == AMADEUSIUM:
+                value += CARRY_VALUE * robot[3] - DISTANCE_PENALTY * robot[0]
+            elif task[0] != IDLE and not self.done(task):
+                index = task[1]
+                value -= DISTANCE_PENALTY * (abs(robot[0] - index % width) + abs(robot[1] - index // width))
+        return value
+
+
+def snapshot(game):
+    grid = game.grid
+    robots = [[robot.x, robot.y, robot.item, 1.0 if robot.item == AMADEUSIUM else 0.0] for robot in game.my_robots]
+    return Snapshot(grid, game.radar_planner.gains, {}, grid.traps, grid.radars, robots,
+                    [game.radar_cooldown, game.trap_cooldown], 0.0)
+
+
+class Planner:
+    def __init__(self):
+        self.best = {}
+        self.evaluations = 0
+        self.elapsed = 0
+
+    def candidates(self, game, root, robot):
+        tasks = [(IDLE, None)]
+        if robot.is_dead():
+            return tasks
+        radar = robot.item == RADAR or game.radar_cooldown <= -(-robot.x // MOVE_RANGE)
+        previous = self.best.get(robot.id)
+        if previous is not None and not root.done(previous) and (radar or previous[0] != PLACE_RADAR):
+            tasks.append(previous)
+        spots = sorted(game.safe_spots, key=robot.distance)[:PLAN_CANDIDATES]
+        spots += sorted(game.unsafe_spots, key=robot.distance)[:PLAN_CANDIDATES // 2]
+        tasks += [(MINE, spot.x + width * spot.y) for spot in spots]
+        tasks += [(MINE, index) for index in self.unexplored(game.grid, robot)]
+        if radar:
+            if game.radar_spot is not None:
+                tasks.append((PLACE_RADAR, game.radar_spot.x + width * game.radar_spot.y))
+            tasks += [(PLACE_RADAR, spot.x + width * spot.y) for spot in spots[:1]]
+        return list(dict.fromkeys(tasks))
+
+    def unexplored(self, grid, robot):
+        cells = []
+        for x in range(max(robot.x, MOVE_RANGE + 1), width):
+            for y in (robot.y, robot.y - 1, robot.y + 1, robot.y - 2, robot.y + 2):
+                index = x + width * y
+                if (height > y >= 0 and grid.amadeusium[index] == UNKNOWN and not grid.holes[index]
+                        and not grid.potential_trap(index)):
+                    cells.append(index)
+                    if len(cells) == PLAN_UNEXPLORED:
+                        return cells
+        return cells
+
+    def evaluate(self, root, tasks):
+        rollout = root.fork()
+        for _ in range(PLAN_HORIZON):
+            rollout.step(tasks)
+        self.evaluations += 1
+        return rollout.score(tasks)
+
+    def plan(self, game, deadline):
+        start = perf_counter_ns()
+        self.evaluations = 0
+        root = snapshot(game)
+        candidates = [self.candidates(game, root, robot) for robot in game.my_robots]
+        tasks = [options[1] if len(options) > 1 else options[0] for options in candidates]
+        best_value = self.evaluate(root, tasks)
+        improved = True
+        while improved and perf_counter_ns() < deadline:
+            improved = False
+            for robot, options in enumerate(candidates):
+                best_task = tasks[robot]
+                for task in options:
+                    if task == best_task or perf_counter_ns() >= deadline:
+                        continue
+                    tasks[robot] = task
+                    value = self.evaluate(root, tasks)
+                    if value > best_value + 1e-9:
+                        best_value, best_task = value, task
+                        improved = True
+                tasks[robot] = best_task
+        self.best = {robot.id: task for robot, task in zip(game.my_robots, tasks)}
+        self.elapsed = perf_counter_ns() - start
+        if DEBUG:
+            print("plan {:.2f} {}".format(best_value, self.best), file=sys.stderr)
+        return root.fork().step(tasks), tasks
+
+    def rate(self):
+        return self.evaluations * 10 ** 9 // max(1, self.elapsed)
+
+
+def issue(robot, command, task):
+    action, x, y = command
+    message = "{} {}".format(task[0], "" if task[1] is None else "{} {}".format(task[1] % width, task[1] // width))
+    if action == "MOVE":
+        robot.move(x, y, message)
+    elif action == "DIG":
+        robot.dig(x, y, message)
+    elif action == "REQUEST":
+        robot.request(x, message)
+    else:
+        robot.wait(message)
+
+
 game = Game()
+profiler = Profiler()
+planner = Planner()
 
 while True:
-    game.my_score, game.enemy_score = [int(i) for i in input().split()]
+    game.my_score, game.enemy_score = [int(i) for i in read_line().split()]
+    profiler.start()
+    deadline = profiler.last + PLAN_BUDGET_NS
     for i in range(height):
-        inputs = input().split()
-        for j in range(width):
-            amadeusium = inputs[2 * j]
-            hole = int(inputs[2 * j + 1])
-            game.grid.get_cell(j, i).update(amadeusium, hole)
-    entity_count, game.radar_cooldown, game.trap_cooldown = [int(i) for i in input().split()]
+        game.grid.update_row(i, read_line())
+    entity_count, game.radar_cooldown, game.trap_cooldown = [int(i) for i in read_line().split()]
     game.next_turn()
     for i in range(entity_count):
-        id, type, x, y, item = [int(j) for j in input().split()]
+        id, type, x, y, item = [int(j) for j in read_line().split()]
         game.update_entity(id, type, x, y, item)
+    profiler.lap("parse")
     game.compute_strat()
+    profiler.lap("evaluate")
 
-    if game.turn == 1:
+    if PLANNER:
+        commands, tasks = planner.plan(game, deadline)
+        for robot, command, task in zip(game.my_robots, commands, tasks):
+            issue(robot, command, task)
+    elif game.turn == 1:
         random.shuffle(game.my_robots)
         game.my_robots[0].request(RADAR)
         game.my_robots[1].request(TRAP)
@@ -351,3 +778,11 @@ while True:
     else:
         for robot in game.my_robots:
             apply_strategy(game, robot)
+    sys.stdout.flush()
+    profiler.lap("decide")
+    if PROFILE:
+        profiler.count("spots", len(game.safe_spots) + len(game.unsafe_spots))
+        if PLANNER:
+            profiler.count("evals", planner.evaluations)
+            profiler.count("evals/s", planner.rate())
+        print(profiler.report(), file=sys.stderr)
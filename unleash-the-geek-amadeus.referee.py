@@ -0,0 +1,297 @@
+import argparse
+import os
+import random
+import select
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter_ns
+
+BOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unleash-the-geek-amadeus.py")
+
+WIDTH = 30
+HEIGHT = 15
+ROBOTS = 5
+TURNS = 200
+RADAR_RANGE = 4
+MOVE_RANGE = 4
+COOLDOWN = 5
+FIRST_TURN_LIMIT_MS = 1000
+TURN_LIMIT_MS = 50
+TIMEOUT_S = 5
+
+NONE = -1
+ROBOT_ALLY = 0
+ROBOT_ENEMY = 1
+RADAR = 2
+TRAP = 3
+AMADEUSIUM = 4
+DEAD = (-1, -1)
+
+
+def distance(x1, y1, x2, y2):
+    return abs(x1 - x2) + abs(y1 - y2)
+
+
+class Bot:
+    def __init__(self, path):
+        self.process = subprocess.Popen(
+            [sys.executable, path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        self.crashed = False
+        self.timed_out = False
+        self.pending = b""
+        self.latencies = []
+
+    def send(self, lines):
+        if self.crashed:
+            return
+        try:
+            self.process.stdin.write(("\n".join(lines) + "\n").encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.crashed = True
+
+    def read_line(self):
+        while b"\n" not in self.pending:
+            ready, _, _ = select.select([self.process.stdout], [], [], TIMEOUT_S)
+            if not ready:
+                self.timed_out = True
+                return b""
+            chunk = os.read(self.process.stdout.fileno(), 4096)
+            if not chunk:
+                return b""
+            self.pending += chunk
+        line, self.pending = self.pending.split(b"\n", 1)
+        return line
+
+    def play(self, lines, nb_commands):
+        start = perf_counter_ns()
+        self.send(lines)
+        commands = []
+        for _ in range(nb_commands):
+            line = b"" if self.crashed else self.read_line()
+            if not line:
+                self.crashed = True
+                line = b"WAIT"
+            commands.append(line.decode().split())
+        if not self.crashed:
+            self.latencies.append((perf_counter_ns() - start) / 10 ** 6)
+        return commands
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.kill()
+        self.process.wait()
+
+
+class Referee:
+    def __init__(self, seed):
+        rng = random.Random(seed)
+        self.ore = [[0] * WIDTH for _ in range(HEIGHT)]
+        for _ in range(rng.randint(10, 16)):
+            vein_x, vein_y = rng.randrange(4, WIDTH - 1), rng.randrange(HEIGHT)
+            radius = rng.randint(1, 3)
+            for y in range(max(0, vein_y - radius), min(HEIGHT, vein_y + radius + 1)):
+                for x in range(max(1, vein_x - radius), min(WIDTH, vein_x + radius + 1)):
+                    if distance(x, y, vein_x, vein_y) <= radius and rng.random() < 0.7:
+                        self.ore[y][x] = min(3, self.ore[y][x] + rng.randint(1, 2))
+        self.holes = [[False] * WIDTH for _ in range(HEIGHT)]
+        starts = rng.sample(range(HEIGHT), ROBOTS)
+        self.robots = [[[0, y, NONE] for y in starts] for _ in range(2)]
+        self.radars = [{}, {}]
+        self.traps = [{}, {}]
+        self.cooldowns = [[0, 0], [0, 0]]
+        self.scores = [0, 0]
+        self.next_id = 2 * ROBOTS
+
+    def robot_id(self, player, index):
+        return player * ROBOTS + index
+
+    def item_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def visible_ore(self, player):
+        visible = set()
+        for x, y in self.radars[player]:
+            for m in range(max(0, y - RADAR_RANGE), min(HEIGHT, y + RADAR_RANGE + 1)):
+                reach = RADAR_RANGE - abs(y - m)
+                for n in range(max(0, x - reach), min(WIDTH, x + reach + 1)):
+                    visible.add((n, m))
+        return visible
+
+    def view(self, player, turn):
+        lines = ["{} {}".format(self.scores[player], self.scores[1 - player])]
+        if turn == 1:
+            lines.insert(0, "{} {}".format(WIDTH, HEIGHT))
+        visible = self.visible_ore(player)
+        for y in range(HEIGHT):
+            lines.append(" ".join("{} {}".format(self.ore[y][x] if (x, y) in visible else "?", int(self.holes[y][x]))
+                                  for x in range(WIDTH)))
+        entities = []
+        for owner in range(2):
+            for index, (x, y, item) in enumerate(self.robots[owner]):
+                kind = ROBOT_ALLY if owner == player else ROBOT_ENEMY
+                entities.append("{} {} {} {} {}".format(self.robot_id(owner, index), kind, x, y, item if owner == player else NONE))
+        entities += ["{} {} {} {} -1".format(id, RADAR, x, y) for (x, y), id in self.radars[player].items()]
+        entities += ["{} {} {} {} -1".format(id, TRAP, x, y) for (x, y), id in self.traps[player].items()]
+        lines.append("{} {} {}".format(len(entities), *self.cooldowns[player]))
+        return lines + entities
+
+    def explode(self, x, y):
+        pending = [(x, y)]
+        exploded = set()
+        while pending:
+            cell = pending.pop()
+            if cell in exploded:
+                continue
+            exploded.add(cell)
+            for traps in self.traps:
+                traps.pop(cell, None)
+            for other in list(self.traps[0]) + list(self.traps[1]):
+                if distance(*cell, *other) <= 1:
+                    pending.append(other)
+        for robots in self.robots:
+            for robot in robots:
+                if (robot[0], robot[1]) != DEAD and any(distance(robot[0], robot[1], *cell) <= 1 for cell in exploded):
+                    robot[:] = [*DEAD, NONE]
+
+    def step(self, commands):
+        moves = []
+        digs = []
+        for player in range(2):
+            requested = set()
+            for robot, command in zip(self.robots[player], commands[player]):
+                x, y, item = robot
+                if (x, y) == DEAD or not command:
+                    continue
+                action = command[0]
+                if action == "MOVE" and len(command) >= 3:
+                    moves.append((robot, int(command[1]), int(command[2])))
+                elif action == "DIG" and len(command) >= 3:
+                    target_x, target_y = int(command[1]), int(command[2])
+                    if distance(x, y, target_x, target_y) <= 1:
+                        digs.append((player, robot, target_x, target_y))
+                    else:
+                        moves.append((robot, target_x, target_y))
+                elif action == "REQUEST" and len(command) >= 2:
+                    kind = {"RADAR": 0, "TRAP": 1}.get(command[1])
+                    if kind is None:
+                        continue
+                    if x != 0:
+                        moves.append((robot, 0, y))
+                    elif self.cooldowns[player][kind] == 0 and kind not in requested and item == NONE:
+                        requested.add(kind)
+                        robot[2] = (RADAR, TRAP)[kind]
+
+            for kind in requested:
+                self.cooldowns[player][kind] = COOLDOWN + 1
+
+        for player, robot, x, y in digs:
+            if (x, y) in self.traps[0] or (x, y) in self.traps[1]:
+                self.explode(x, y)
+        for player, robot, x, y in digs:
+            if (robot[0], robot[1]) == DEAD or not (0 < x < WIDTH and 0 <= y < HEIGHT):
+                continue
+            self.holes[y][x] = True
+            self.radars[1 - player].pop((x, y), None)
+            if robot[2] == RADAR:
+                self.radars[player].setdefault((x, y), self.item_id())
+                robot[2] = NONE
+            elif robot[2] == TRAP:
+                self.traps[player].setdefault((x, y), self.item_id())
+                robot[2] = NONE
+            elif robot[2] == NONE and self.ore[y][x] > 0:
+                self.ore[y][x] -= 1
+                robot[2] = AMADEUSIUM
+
+        for robot, target_x, target_y in moves:
+            if (robot[0], robot[1]) == DEAD:
+                continue
+            target_x = min(max(target_x, 0), WIDTH - 1)
+            target_y = min(max(target_y, 0), HEIGHT - 1)
+            steps = MOVE_RANGE
+            horizontal = min(steps, abs(target_x - robot[0]))
+            robot[0] += horizontal if target_x > robot[0] else -horizontal
+            steps -= horizontal
+            vertical = min(steps, abs(target_y - robot[1]))
+            robot[1] += vertical if target_y > robot[1] else -vertical
+
+        for player in range(2):
+            for robot in self.robots[player]:
+                if robot[0] == 0 and robot[2] == AMADEUSIUM:
+                    robot[2] = NONE
+                    self.scores[player] += 1
+            self.cooldowns[player] = [max(0, cooldown - 1) for cooldown in self.cooldowns[player]]
+
+    def over(self):
+        return all((x, y) == DEAD for robots in self.robots for x, y, _ in robots)
+
+
+def play_match(task):
+    seed, bot, opponent, turns = task
+    referee = Referee(seed)
+    bots = [Bot(bot), Bot(opponent)]
+    try:
+        for turn in range(1, turns + 1):
+            commands = [player.play(referee.view(index, turn), ROBOTS) for index, player in enumerate(bots)]
+            referee.step(commands)
+            if referee.over():
+                break
+    finally:
+        for player in bots:
+            player.close()
+    limits = [FIRST_TURN_LIMIT_MS] + [TURN_LIMIT_MS] * (turns - 1)
+    return {
+        "seed": seed,
+        "scores": referee.scores,
+        "crashed": [player.crashed for player in bots],
+        "timed_out": [player.timed_out for player in bots],
+        "latencies": bots[0].latencies,
+        "over_limit": sum(latency > limit for latency, limit in zip(bots[0].latencies, limits)),
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded Unleash the Geek matches between two bots and report ore and latency.")
+    parser.add_argument("--bot", default=BOT)
+    parser.add_argument("--opponent", default=BOT)
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--turns", type=int, default=TURNS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    arguments = parser.parse_args()
+
+    tasks = [(arguments.seed + game, arguments.bot, arguments.opponent, arguments.turns) for game in range(arguments.games)]
+    with ProcessPoolExecutor(max_workers=arguments.workers) as pool:
+        results = list(pool.map(play_match, tasks))
+
+    print("{:>6} {:>5} {:>8} {:>8} {:>8} {:>8} {:>5}".format("seed", "ore", "opponent", "p50 ms", "p99 ms", "max ms", "slow"))
+    for result in results:
+        latencies = result["latencies"]
+        flags = " timed out" if result["timed_out"][0] else " crashed" if result["crashed"][0] else ""
+        print("{:>6} {:>5} {:>8} {:>8.2f} {:>8.2f} {:>8.2f} {:>5}{}".format(
+            result["seed"], result["scores"][0], result["scores"][1],
+            percentile(latencies, 0.5), percentile(latencies, 0.99), max(latencies, default=0), result["over_limit"], flags))
+
+    latencies = [latency for result in results for latency in result["latencies"][1:]]
+    print("games {} ore/game {:.1f} vs {:.1f} wins {} latency p50 {:.2f}ms p90 {:.2f}ms p99 {:.2f}ms".format(
+        len(results),
+        sum(result["scores"][0] for result in results) / len(results),
+        sum(result["scores"][1] for result in results) / len(results),
+        sum(result["scores"][0] > result["scores"][1] for result in results),
+        percentile(latencies, 0.5), percentile(latencies, 0.9), percentile(latencies, 0.99)))
+
+
+if __name__ == "__main__":
+    main()